@@ -0,0 +1,16 @@
+"""Async read-only account endpoints for ASGI deployments."""
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from .authentication import async_jwt_required, get_customer_pk, get_restaurant_pk
+
+
+@async_jwt_required
+async def user_type(request):
+    """Async variant of UserTypeView; the roles are resolved at authentication."""
+    user = request.user
+    data = {
+        'is_restaurant': get_restaurant_pk(user) is not None,
+        'is_customer': get_customer_pk(user) is not None,
+    }
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json')
@@ -0,0 +1,225 @@
+from functools import cached_property, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import User
+
+PROFILE_ATTRIBUTES = {
+    'restaurant_profile': 'restaurant_pk',
+    'customer_profile': 'customer_pk',
+}
+
+# Claims read by ClaimsUser; tokens issued without them load the User instead
+ROLE_CLAIMS = ('is_restaurant', 'is_customer', 'is_staff')
+
+
+class ClaimsUser:
+    """
+    Request user resolved from the claims of a validated access token.
+
+    Identity, role and profile primary keys come from the token, so
+    authorization needs no query. Profiles share their primary key with the
+    user, which is why ``restaurant_pk``/``customer_pk`` equal ``pk`` when the
+    role claim is set. Any other attribute (``email``, ``restaurant_profile``,
+    ...) transparently loads the real User on first access.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token, user_id):
+        self.token = token
+        self.pk = self.id = user_id
+
+    @cached_property
+    def restaurant_pk(self):
+        if 'is_restaurant' not in self.token:
+            return self.pk if hasattr(self.user, 'restaurant_profile') else None
+        return self.pk if self.token['is_restaurant'] else None
+
+    @cached_property
+    def customer_pk(self):
+        if 'is_customer' not in self.token:
+            return self.pk if hasattr(self.user, 'customer_profile') else None
+        return self.pk if self.token['is_customer'] else None
+
+    @cached_property
+    def is_staff(self):
+        if 'is_staff' not in self.token:
+            return self.user.is_staff
+        return self.token['is_staff']
+
+    def resolve_roles(self):
+        """Resolve the roles up front, loading the User if the token lacks a role claim."""
+        return self.restaurant_pk, self.customer_pk, self.is_staff
+
+    @cached_property
+    def user(self):
+        """The User row, loaded (with both profiles) only when needed."""
+        return User.objects.select_related('restaurant_profile', 'customer_profile').get(pk=self.pk)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        # Profiles the token says do not exist are missing without a query
+        if name in PROFILE_ATTRIBUTES and getattr(self, PROFILE_ATTRIBUTES[name]) is None:
+            raise getattr(User, name).RelatedObjectDoesNotExist(f'User has no {name}.')
+        return getattr(self.user, name)
+
+    def __eq__(self, other):
+        return getattr(other, 'pk', None) == self.pk and getattr(other, 'is_authenticated', False)
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.token.get('email', str(self.pk))
+
+
+def user_active_key(user_id):
+    return f'user-active:{user_id}'
+
+
+def get_user_active_timeout():
+    return getattr(settings, 'USER_ACTIVE_CACHE_SECONDS', 60)
+
+
+def set_user_active(user_id, is_active):
+    """Record whether ``user_id`` may use its tokens; False for deleted users."""
+    cache.set(user_active_key(user_id), is_active, get_user_active_timeout())
+
+
+def is_user_active(user_id):
+    """
+    Return whether ``user_id`` exists and is active.
+
+    The flag is cached for ``USER_ACTIVE_CACHE_SECONDS`` and refreshed when a
+    user is saved or deleted, so most requests run no query for it.
+    """
+    is_active = cache.get(user_active_key(user_id))
+    if is_active is None:
+        is_active = User.objects.filter(pk=user_id, is_active=True).exists()
+        set_user_active(user_id, is_active)
+    return is_active
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the token claims instead of loading the user.
+
+    Tokens are signed, so the per-request User and profile lookups done by
+    JWTAuthentication are skipped. Only whether the user still exists and
+    is active is checked, against a cached flag (see ``is_user_active``).
+    """
+
+    def get_user(self, validated_token):
+        user_id = get_token_user_id(validated_token)
+        if user_id is None:
+            raise InvalidToken('Token contained no recognizable user identification')
+        if not is_user_active(user_id):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return ClaimsUser(validated_token, user_id)
+
+
+def get_restaurant_pk(user):
+    """Return the restaurant profile pk of ``user``, or None, without a query for token users."""
+    if not user.is_authenticated:
+        return None
+    if isinstance(user, ClaimsUser):
+        return user.restaurant_pk
+    return user.pk if hasattr(user, 'restaurant_profile') else None
+
+
+def get_customer_pk(user):
+    """Return the customer profile pk of ``user``, or None, without a query for token users."""
+    if not user.is_authenticated:
+        return None
+    if isinstance(user, ClaimsUser):
+        return user.customer_pk
+    return user.pk if hasattr(user, 'customer_profile') else None
+
+
+def get_validated_token(request, allow_query_param=False):
+    """
+    Return the validated JWT sent with ``request``, or None.
+
+    The token is read from the ``Authorization: Bearer`` header, or from the
+    ``token`` query parameter when ``allow_query_param`` is set (for clients
+    such as EventSource that cannot send headers). No query is run.
+    """
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        raw_token = header.split(' ', 1)[1]
+    elif allow_query_param:
+        raw_token = request.GET.get('token')
+    else:
+        raw_token = None
+    if not raw_token:
+        return None
+    try:
+        return JWTAuthentication().get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return None
+
+
+def get_token_user_id(token):
+    """Return the user primary key stored in a validated token, or None."""
+    try:
+        return int(token[jwt_settings.USER_ID_CLAIM])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+async def aauthenticate(request):
+    """
+    Return the user for the request's JWT, or None, like ``ClaimsJWTAuthentication``.
+
+    The user is a ``ClaimsUser`` checked against the cached active flag, so
+    most requests run no query. Its roles are resolved here, in the sync
+    thread when that needs the User row, so role checks in async views such
+    as ``get_restaurant_pk(user)`` never query.
+    """
+    token = get_validated_token(request)
+    user_id = get_token_user_id(token) if token is not None else None
+    if user_id is None:
+        return None
+    is_active = cache.get(user_active_key(user_id))
+    if is_active is None:
+        is_active = await sync_to_async(is_user_active)(user_id)
+    if not is_active:
+        return None
+    user = ClaimsUser(token, user_id)
+    if any(claim not in token for claim in ROLE_CLAIMS):
+        await sync_to_async(user.resolve_roles)()
+    return user
+
+
+def async_jwt_required(view):
+    """
+    Decorate an async read-only view: allow only GET/HEAD and require a valid JWT.
+
+    The authenticated user is set on ``request.user``.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return JsonResponse(
+                {"detail": f'Method "{request.method}" not allowed.'},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+        user = await aauthenticate(request)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided or are invalid."},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,100 @@
+"""
+Geohash helpers for the nearby restaurant search.
+
+Every restaurant with coordinates stores its geohash in an indexed column.
+Points sharing a geohash prefix lie in the same grid cell, so the few cells
+covering a search circle translate into a few B-tree range scans; exact
+distances are only computed for the restaurants found in those cells.
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_LENGTH = 12
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode_geohash(latitude, longitude, length=GEOHASH_LENGTH):
+    """Return the geohash of a point, ``length`` characters long."""
+    latitude_range, longitude_range = [-90.0, 90.0], [-180.0, 180.0]
+    latitude, longitude = float(latitude), float(longitude)
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < length:
+        # Bits alternate between longitude and latitude, longitude first
+        interval, coordinate = (longitude_range, longitude) if even else (latitude_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(length):
+    """Return the (latitude, longitude) size in degrees of the cells of a geohash length."""
+    longitude_bits = math.ceil(length * 5 / 2)
+    latitude_bits = length * 5 // 2
+    return 180.0 / 2 ** latitude_bits, 360.0 / 2 ** longitude_bits
+
+
+def distance_km(latitude1, longitude1, latitude2, longitude2):
+    """Great-circle (haversine) distance between two points."""
+    phi1, phi2 = math.radians(float(latitude1)), math.radians(float(latitude2))
+    delta_phi = phi2 - phi1
+    delta_lambda = math.radians(float(longitude2) - float(longitude1))
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return ``(min_lat, max_lat, min_lng, max_lng)`` around a circle; longitudes may exceed ±180."""
+    latitude, longitude = float(latitude), float(longitude)
+    delta_latitude = radius_km / KM_PER_DEGREE
+    if abs(latitude) + delta_latitude >= 90.0:
+        # The circle contains a pole, so it spans every longitude
+        delta_longitude = 180.0
+    else:
+        cos_latitude = math.cos(math.radians(abs(latitude) + delta_latitude))
+        delta_longitude = min(180.0, radius_km / (KM_PER_DEGREE * cos_latitude))
+    return (
+        max(-90.0, latitude - delta_latitude), min(90.0, latitude + delta_latitude),
+        longitude - delta_longitude, longitude + delta_longitude,
+    )
+
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """
+    Return the geohash prefixes of the cells covering a circle.
+
+    The prefix length is the longest whose cells are at least half as large
+    as the circle's bounding box, so at most 3 x 3 cells are returned.
+    """
+    min_latitude, max_latitude, min_longitude, max_longitude = bounding_box(latitude, longitude, radius_km)
+    length = 1
+    while length < GEOHASH_LENGTH:
+        latitude_size, longitude_size = cell_size(length + 1)
+        if latitude_size < (max_latitude - min_latitude) / 2 or longitude_size < (max_longitude - min_longitude) / 2:
+            break
+        length += 1
+
+    latitude_size, longitude_size = cell_size(length)
+    prefixes = set()
+    for latitude_point in steps(min_latitude, max_latitude, latitude_size):
+        for longitude_point in steps(min_longitude, max_longitude, longitude_size):
+            # Wrap longitudes across the antimeridian
+            longitude_point = (longitude_point + 180.0) % 360.0 - 180.0
+            prefixes.add(encode_geohash(latitude_point, longitude_point, length))
+    return sorted(prefixes)
+
+
+def steps(start, stop, step):
+    """Points from ``start`` to ``stop`` (both included) no further apart than ``step``."""
+    count = max(1, math.ceil((stop - start) / step))
+    return [start + (stop - start) * index / count for index in range(count + 1)]
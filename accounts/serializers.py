@@ -48,6 +48,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['email'] = user.email
         token['is_restaurant'] = hasattr(user, 'restaurant_profile')
         token['is_customer'] = hasattr(user, 'customer_profile')
+        token['is_staff'] = user.is_staff
         
         return token
 
@@ -56,8 +57,39 @@ class RestaurantProfileSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Restaurant
-        fields = ('user', 'email', 'name', 'location', 'phone_number', 'created_at', 'updated_at')
+        fields = (
+            'user', 'email', 'name', 'location', 'latitude', 'longitude', 'phone_number',
+            'created_at', 'updated_at'
+        )
         read_only_fields = ('user', 'created_at', 'updated_at')
+        extra_kwargs = {
+            'latitude': {'min_value': -90, 'max_value': 90},
+            'longitude': {'min_value': -180, 'max_value': 180},
+        }
+    
+    def validate(self, data):
+        latitude = data.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = data.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError("latitude and longitude must be set together.")
+        return data
+
+class NearbyRestaurantQuerySerializer(serializers.Serializer):
+    """Query parameters of the nearby restaurants endpoint."""
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(required=False, min_value=0.1, max_value=50, default=5)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=20)
+    is_vegetarian = serializers.BooleanField(required=False, default=None, allow_null=True)
+    is_vegan = serializers.BooleanField(required=False, default=None, allow_null=True)
+    is_gluten_free = serializers.BooleanField(required=False, default=None, allow_null=True)
+
+class NearbyRestaurantSerializer(serializers.ModelSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = Restaurant
+        fields = ('user', 'name', 'location', 'phone_number', 'latitude', 'longitude', 'distance_km')
 
 class CustomerProfileSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source='user.email', read_only=True)
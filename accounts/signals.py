@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from .authentication import set_user_active
 from .models import Restaurant, Customer
 
 User = get_user_model()
@@ -25,3 +26,13 @@ def save_user_profile(sender, instance, **kwargs):
         instance.restaurant_profile.save()
     elif hasattr(instance, 'customer_profile'):
         instance.customer_profile.save()
+
+@receiver(post_save, sender=User)
+def refresh_user_active(sender, instance, **kwargs):
+    """Apply (de)activations to token authentication right away."""
+    set_user_active(instance.pk, instance.is_active)
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user(sender, instance, **kwargs):
+    """Reject the tokens of a deleted user right away."""
+    set_user_active(instance.pk, False)
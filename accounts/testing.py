@@ -0,0 +1,32 @@
+"""
+Fixtures shared by the test suites of the apps.
+"""
+from rest_framework.test import APIClient
+
+from .models import Customer, Restaurant, User
+from .serializers import CustomTokenObtainPairSerializer
+
+
+def create_restaurant(email='kitchen@example.com', name='Kitchen', **fields):
+    """Create a restaurant user and its profile."""
+    user = User.objects.create_user(email=email, password='password')
+    # The profile signal defaults every new user to a customer
+    Customer.objects.filter(user=user).delete()
+    fields.setdefault('location', 'Market Street')
+    return Restaurant.objects.create(user=User.objects.get(pk=user.pk), name=name, **fields)
+
+
+def create_customer(email='customer@example.com'):
+    """Create a customer user and return its profile."""
+    return User.objects.create_user(email=email, password='password').customer_profile
+
+
+def auth_headers(user):
+    """Return the headers authenticating a request with an access token of ``user``."""
+    token = CustomTokenObtainPairSerializer.get_token(user).access_token
+    return {'Authorization': f'Bearer {token}'}
+
+
+def api_client(user):
+    """Return an API client authenticated with an access token of ``user``."""
+    return APIClient(HTTP_AUTHORIZATION=auth_headers(user)['Authorization'])
@@ -0,0 +1,221 @@
+import math
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from menu.models import MenuItem
+from .geo import EARTH_RADIUS_KM, KM_PER_DEGREE, covering_prefixes, distance_km, encode_geohash
+from .models import User
+from .testing import api_client, auth_headers, create_restaurant
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='customer@example.com', password='password')
+        self.client = api_client(self.user)
+
+    def test_active_user_is_authenticated_without_a_query(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/accounts/user-type/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_customer'])
+
+    def test_active_flag_is_loaded_once_when_not_cached(self):
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/accounts/user-type/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/accounts/user-type/').status_code, 200)
+
+    def test_deactivated_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/api/accounts/user-type/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'user_inactive')
+
+    def test_deleted_user_is_rejected(self):
+        self.user.delete()
+        self.assertEqual(self.client.get('/api/accounts/user-type/').status_code, 401)
+        cache.clear()
+        self.assertEqual(self.client.get('/api/accounts/user-type/').status_code, 401)
+
+
+class AsyncAuthenticationTests(TestCase):
+    """The async endpoints authenticate like ClaimsJWTAuthentication."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='customer@example.com', password='password')
+
+    def get_user_type(self, headers):
+        # Queries of the async view run on this thread's connection
+        return async_to_sync(self.async_client.get)('/api/accounts/async/user-type/', headers=headers)
+
+    def test_active_user_is_authenticated_without_a_query(self):
+        restaurant = create_restaurant()
+        for user, expected in ((self.user, 'is_customer'), (restaurant.user, 'is_restaurant')):
+            headers = auth_headers(user)
+            with self.subTest(expected), self.assertNumQueries(0):
+                response = self.get_user_type(headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()[expected])
+
+    def test_active_flag_is_loaded_once_when_not_cached(self):
+        headers = auth_headers(self.user)
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_user_type(headers).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_user_type(headers).status_code, 200)
+
+    def test_deactivated_user_is_rejected(self):
+        headers = auth_headers(self.user)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_user_type(headers).status_code, 401)
+        cache.clear()
+        self.assertEqual(self.get_user_type(headers).status_code, 401)
+
+    def test_token_without_role_claims_loads_the_user(self):
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        with self.assertNumQueries(1):
+            response = self.get_user_type(headers)
+        self.assertEqual(response.json(), {'is_restaurant': False, 'is_customer': True})
+
+
+def destination(latitude, longitude, bearing, km):
+    """Return the point ``km`` away from a point in the direction ``bearing`` (degrees)."""
+    phi, lam, theta = math.radians(latitude), math.radians(longitude), math.radians(bearing)
+    delta = km / EARTH_RADIUS_KM
+    phi2 = math.asin(math.sin(phi) * math.cos(delta) + math.cos(phi) * math.sin(delta) * math.cos(theta))
+    lam2 = lam + math.atan2(
+        math.sin(theta) * math.sin(delta) * math.cos(phi), math.cos(delta) - math.sin(phi) * math.sin(phi2)
+    )
+    return math.degrees(phi2), (math.degrees(lam2) + 540) % 360 - 180
+
+
+class GeohashCoverTests(SimpleTestCase):
+    """The cells of ``covering_prefixes`` hold every point of the circle."""
+
+    def assertCovers(self, latitude, longitude, radius_km):
+        prefixes = covering_prefixes(latitude, longitude, radius_km)
+        self.assertLessEqual(len(prefixes), 9)
+        for bearing in range(0, 360, 5):
+            for fraction in (0.5, 0.999):
+                point = destination(latitude, longitude, bearing, radius_km * fraction)
+                self.assertAlmostEqual(distance_km(latitude, longitude, *point), radius_km * fraction, places=6)
+                geohash = encode_geohash(*point)
+                self.assertTrue(
+                    any(geohash.startswith(prefix) for prefix in prefixes),
+                    f"{point} ({geohash}) is outside {prefixes}",
+                )
+        return prefixes
+
+    def test_encode_geohash(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(encode_geohash(0, 0, 1), 's')
+        self.assertEqual(encode_geohash(-0.000001, -0.000001, 1), '7')
+
+    def test_circle_in_one_cell(self):
+        self.assertCovers(51.50, -0.12, 2)
+
+    def test_circle_across_cell_borders(self):
+        # The equator and the prime meridian split the four top level cells
+        prefixes = self.assertCovers(0, 0, 3)
+        self.assertEqual({prefix[0] for prefix in prefixes}, {'7', 'e', 'k', 's'})
+        # Just inside the border of a cell
+        self.assertCovers(45.000001, 0.000001, 5)
+
+    def test_high_latitudes(self):
+        self.assertCovers(78.22, 15.65, 25)
+        self.assertCovers(-77.85, 166.67, 10)
+        # The circle around the pole spans every longitude
+        self.assertCovers(89.99, 0, 10)
+
+    def test_circle_across_the_antimeridian(self):
+        prefixes = self.assertCovers(-17.8, 179.99, 5)
+        self.assertTrue(any(prefix < '8' for prefix in prefixes) and any(prefix >= '8' for prefix in prefixes))
+        self.assertCovers(65.0, -179.999, 40)
+
+
+class NearbyRestaurantsViewTests(TestCase):
+    latitude, longitude = 52.52, 13.405
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(email='customer@example.com', password='password')
+        # Due north, where degrees of latitude convert to exact distances
+        cls.near = cls.create_nearby('near@example.com', 1.0, is_vegan=True)
+        cls.middle = cls.create_nearby('middle@example.com', 3.0, is_vegetarian=True)
+        cls.edge = cls.create_nearby('edge@example.com', 4.99, is_gluten_free=True)
+        cls.far = cls.create_nearby('far@example.com', 5.01)
+        # Neither a menu nor coordinates make a restaurant nearby
+        create_restaurant(email='closed@example.com', latitude=cls.latitude, longitude=cls.longitude)
+        no_coordinates = create_restaurant(email='nowhere@example.com')
+        MenuItem.objects.create(restaurant=no_coordinates, name='Soup', price=Decimal('4'))
+
+    @classmethod
+    def create_nearby(cls, email, km, **dietary):
+        restaurant = create_restaurant(
+            email=email, name=email.split('@')[0],
+            latitude=Decimal(str(round(cls.latitude + km / KM_PER_DEGREE, 6))), longitude=Decimal(str(cls.longitude)),
+        )
+        MenuItem.objects.create(restaurant=restaurant, name='Dish', price=Decimal('5'), **dietary)
+        # Unavailable items do not count
+        MenuItem.objects.create(restaurant=restaurant, name='Off', price=Decimal('5'), is_available=False, is_vegan=True)
+        return restaurant
+
+    def get(self, **params):
+        params = {'lat': self.latitude, 'lng': self.longitude, **params}
+        return api_client(self.customer).get('/api/accounts/restaurants/nearby/', params)
+
+    def get_names(self, **params):
+        response = self.get(**params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [restaurant['name'] for restaurant in response.data]
+
+    def test_nearest_first_within_the_radius(self):
+        response = self.get()
+        self.assertEqual([restaurant['name'] for restaurant in response.data], ['near', 'middle', 'edge'])
+        self.assertEqual([round(restaurant['distance_km']) for restaurant in response.data], [1, 3, 5])
+        self.assertEqual(self.get_names(radius=2), ['near'])
+        self.assertEqual(self.get_names(radius=10), ['near', 'middle', 'edge', 'far'])
+        self.assertEqual(self.get_names(limit=2), ['near', 'middle'])
+
+    def test_dietary_filters(self):
+        self.assertEqual(self.get_names(is_vegan='true'), ['near'])
+        self.assertEqual(self.get_names(is_vegetarian='true'), ['middle'])
+        self.assertEqual(self.get_names(is_gluten_free='true'), ['edge'])
+        self.assertEqual(self.get_names(is_vegan='false'), ['middle', 'edge'])
+
+    def test_across_the_antimeridian(self):
+        restaurant = create_restaurant(email='fiji@example.com', name='fiji', latitude=Decimal('-17.8'), longitude=Decimal('-179.99'))
+        MenuItem.objects.create(restaurant=restaurant, name='Dish', price=Decimal('5'))
+        self.assertEqual(self.get_names(lat=-17.8, lng=179.99), ['fiji'])
+
+    def test_invalid_parameters(self):
+        cases = [
+            ({'lat': ''}, 'lat'),
+            ({'lng': 'east'}, 'lng'),
+            ({'lat': 90.5}, 'lat'),
+            ({'lng': -180.5}, 'lng'),
+            ({'radius': 0}, 'radius'),
+            ({'radius': 51}, 'radius'),
+            ({'radius': 'far'}, 'radius'),
+            ({'limit': 0}, 'limit'),
+        ]
+        for params, field in cases:
+            with self.subTest(params=params):
+                response = self.get(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.data), [field])
+        response = api_client(self.customer).get('/api/accounts/restaurants/nearby/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.data), ['lat', 'lng'])
+
+    def test_requires_authentication(self):
+        response = self.client.get('/api/accounts/restaurants/nearby/', {'lat': self.latitude, 'lng': self.longitude})
+        self.assertEqual(response.status_code, 401)
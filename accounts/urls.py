@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     # Authentication
@@ -10,8 +10,12 @@ urlpatterns = [
     
     # User Type
     path('user-type/', views.UserTypeView.as_view(), name='user-type'),
+    path('async/user-type/', async_views.user_type, name='async-user-type'),
     
     # Profiles
     path('restaurant/profile/', views.RestaurantProfileView.as_view(), name='restaurant-profile'),
     path('customer/profile/', views.CustomerProfileView.as_view(), name='customer-profile'),
+    
+    # Discovery
+    path('restaurants/nearby/', views.NearbyRestaurantsView.as_view(), name='restaurant-nearby'),
 ]
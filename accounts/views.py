@@ -3,25 +3,32 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Q
 from .serializers import (
     UserRegistrationSerializer, 
     CustomTokenObtainPairSerializer,
     RestaurantProfileSerializer,
+    NearbyRestaurantQuerySerializer,
+    NearbyRestaurantSerializer,
     CustomerProfileSerializer
 )
+from .authentication import get_customer_pk, get_restaurant_pk
+from .geo import bounding_box, covering_prefixes, distance_km
 from .models import Restaurant, Customer
+from menu.models import MenuItem
+from restaurant_order_system.profiling import ProfiledViewMixin
 
 User = get_user_model()
 
-class UserRegistrationView(generics.CreateAPIView):
+class UserRegistrationView(ProfiledViewMixin, generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
 
-class CustomTokenObtainPairView(TokenObtainPairView):
+class CustomTokenObtainPairView(ProfiledViewMixin, TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
-class RestaurantProfileView(generics.RetrieveUpdateAPIView):
+class RestaurantProfileView(ProfiledViewMixin, generics.RetrieveUpdateAPIView):
     serializer_class = RestaurantProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -34,7 +41,53 @@ class RestaurantProfileView(generics.RetrieveUpdateAPIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class CustomerProfileView(generics.RetrieveUpdateAPIView):
+class NearbyRestaurantsView(ProfiledViewMixin, APIView):
+    """
+    Restaurants within ``radius`` km of ``lat``/``lng``, nearest first.
+    
+    Only restaurants with an available menu item (matching the dietary
+    filters, if any) are listed. Candidates come from geohash prefix range
+    scans of the cells covering the circle, so restaurants elsewhere are
+    never read; exact distances are computed for the candidates only.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        query = NearbyRestaurantQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        latitude, longitude, radius = params['lat'], params['lng'], params['radius']
+        
+        cells = Q()
+        for prefix in covering_prefixes(latitude, longitude, radius):
+            # '~' sorts after every geohash character
+            cells |= Q(geohash__gte=prefix, geohash__lt=prefix + '~')
+        min_latitude, max_latitude = bounding_box(latitude, longitude, radius)[:2]
+        
+        menu_items = MenuItem.objects.filter(restaurant=OuterRef('pk'), is_available=True)
+        for flag in ('is_vegetarian', 'is_vegan', 'is_gluten_free'):
+            if params[flag] is not None:
+                menu_items = menu_items.filter(**{flag: params[flag]})
+        
+        candidates = Restaurant.objects.filter(
+            cells,
+            latitude__gte=min_latitude,
+            latitude__lte=max_latitude,
+        ).filter(Exists(menu_items)).only('name', 'location', 'phone_number', 'latitude', 'longitude')
+        
+        restaurants = []
+        for restaurant in candidates:
+            restaurant.distance_km = round(
+                distance_km(latitude, longitude, restaurant.latitude, restaurant.longitude), 3
+            )
+            if restaurant.distance_km <= radius:
+                restaurants.append(restaurant)
+        restaurants.sort(key=lambda restaurant: (restaurant.distance_km, restaurant.pk))
+        
+        serializer = NearbyRestaurantSerializer(restaurants[:params['limit']], many=True)
+        return Response(serializer.data)
+
+class CustomerProfileView(ProfiledViewMixin, generics.RetrieveUpdateAPIView):
     serializer_class = CustomerProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -47,13 +100,13 @@ class CustomerProfileView(generics.RetrieveUpdateAPIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class UserTypeView(APIView):
+class UserTypeView(ProfiledViewMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
         user = request.user
         data = {
-            'is_restaurant': hasattr(user, 'restaurant_profile'),
-            'is_customer': hasattr(user, 'customer_profile')
+            'is_restaurant': get_restaurant_pk(user) is not None,
+            'is_customer': get_customer_pk(user) is not None
         }
         return Response(data)
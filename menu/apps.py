@@ -0,0 +1,22 @@
+from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+class MenuConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "menu"
+
+    def ready(self):
+        import menu.checks
+        import menu.signals
+        post_migrate.connect(restore_search_index, sender=self)
+
+
+def restore_search_index(using, **kwargs):
+    """Recreate the search triggers SQLite drops when a migration rebuilds the menu item table."""
+    from .search import SEARCH_TABLE, install_search_index
+    connection = connections[using]
+    # Skip databases where the search migration has not run (or was reverted)
+    if connection.vendor == 'sqlite' and SEARCH_TABLE in connection.introspection.table_names():
+        install_search_index(using)
@@ -0,0 +1,64 @@
+"""
+Async read-only menu endpoints for ASGI deployments.
+
+They mirror the list and retrieve actions of MenuItemViewSet with the same
+filters, ``search`` and ``ordering`` parameters and MenuItemSerializer
+output (absolute image URLs included), using the async ORM.
+"""
+from django.http import HttpResponse
+from rest_framework import filters, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from accounts.authentication import async_jwt_required
+from .filters import MenuItemSearchFilter
+from .models import MenuItem
+from .serializers import MenuItemQuerySerializer, MenuItemSerializer
+from .views import MenuItemViewSet
+
+# Query parameter -> queryset lookup for the async list filters
+MENU_ITEM_FILTERS = {
+    'restaurant': 'restaurant_id',
+    'restaurant_id': 'restaurant_id',
+    'category': 'category_id',
+    'is_vegetarian': 'is_vegetarian',
+    'is_vegan': 'is_vegan',
+    'is_gluten_free': 'is_gluten_free',
+    'is_available': 'is_available',
+    'min_price': 'price__gte',
+    'max_price': 'price__lte',
+}
+
+
+def render_json(data, status=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+
+@async_jwt_required
+async def menu_item_list(request):
+    """Async variant of the menu item list."""
+    params = MenuItemQuerySerializer(data=request.GET)
+    if not params.is_valid():
+        return render_json(params.errors, status.HTTP_400_BAD_REQUEST)
+
+    lookups = {
+        MENU_ITEM_FILTERS[name]: value
+        for name, value in params.validated_data.items() if value is not None
+    }
+    queryset = MenuItem.objects.filter(**lookups).select_related('category')
+    # Search and ordering exactly as the viewset does; both only build the query
+    view = MenuItemViewSet(request=Request(request), format_kwarg=None)
+    for backend in (filters.OrderingFilter, MenuItemSearchFilter):
+        queryset = backend().filter_queryset(view.request, queryset, view)
+    items = [item async for item in queryset]
+    return render_json(MenuItemSerializer(items, many=True, context={'request': request}).data)
+
+
+@async_jwt_required
+async def menu_item_detail(request, pk):
+    """Async variant of the menu item detail."""
+    try:
+        item = await MenuItem.objects.select_related('category').aget(pk=pk)
+    except MenuItem.DoesNotExist:
+        return render_json({'detail': 'No MenuItem matches the given query.'}, status.HTTP_404_NOT_FOUND)
+    return render_json(MenuItemSerializer(item, context={'request': request}).data)
@@ -0,0 +1,254 @@
+"""
+Bulk import and streaming export of restaurant menus.
+
+Imports stream-parse CSV or JSON Lines, validate rows in batches and upsert
+them with ``bulk_create(update_conflicts=True)`` on the unique
+``(name, restaurant)`` pair, so the cost is a handful of queries per chunk
+rather than several per item. Exports stream rows straight from
+``queryset.iterator()``.
+"""
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import MenuCategory, MenuItem
+from .serializers import MenuItemImportSerializer
+from .snapshots import bump_menu_version
+
+FORMATS = ('csv', 'jsonl')
+
+# Columns read on import and written on export, in order
+MENU_FIELDS = (
+    'name', 'description', 'price', 'category', 'is_vegetarian', 'is_vegan',
+    'is_gluten_free', 'is_available', 'preparation_time', 'calories',
+)
+
+# Columns overwritten when an imported row matches an existing item
+UPSERT_UPDATE_FIELDS = (
+    'description', 'price', 'category', 'is_vegetarian', 'is_vegan',
+    'is_gluten_free', 'is_available', 'preparation_time', 'calories', 'updated_at',
+)
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class MenuImportResult:
+    """Summary of a bulk menu import."""
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    invalid: int = 0
+    errors: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'invalid': self.invalid,
+            'errors': self.errors,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+def detect_format(filename, content_type=''):
+    """Guess the import format from a file name or content type."""
+    name = (filename or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'jsonl'
+    return 'csv'
+
+
+def iter_rows(stream, file_format):
+    """Yield one dict per input row from a text stream, without reading it all."""
+    if file_format == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Reported as an invalid row by the importer
+                yield None
+    else:
+        for row in csv.DictReader(stream):
+            # Empty cells mean "not provided" so the field defaults apply
+            yield {key: value for key, value in row.items() if key and value not in ('', None)}
+
+
+def text_stream(binary_file, encoding='utf-8'):
+    """Wrap an uploaded binary file so it can be parsed line by line."""
+    return io.TextIOWrapper(binary_file, encoding=encoding, newline='')
+
+
+def import_menu(restaurant, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Upsert menu items for ``restaurant`` from an iterable of row dicts.
+
+    Rows are consumed lazily in chunks; each chunk is validated and written
+    in its own transaction. Invalid rows are skipped and reported.
+    """
+    result = MenuImportResult()
+    started = time.perf_counter()
+    categories = dict(
+        MenuCategory.objects.filter(restaurant=restaurant).values_list('name', 'id')
+    )
+
+    rows = iter(rows)
+    row_number = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        first_row = row_number + 1
+        row_number += len(chunk)
+        result.rows += len(chunk)
+        _import_chunk(restaurant, chunk, first_row, categories, result)
+
+    result.elapsed = time.perf_counter() - started
+    if result.created or result.updated:
+        transaction.on_commit(lambda: bump_menu_version(restaurant.pk))
+    return result
+
+
+def _import_chunk(restaurant, chunk, first_row, categories, result):
+    # Validate the whole chunk with one serializer instance and no queries;
+    # keep the last occurrence of each name since an upsert cannot touch a
+    # row twice in one statement.
+    serializer = MenuItemImportSerializer()
+    valid = {}
+    for offset, row in enumerate(chunk):
+        if not isinstance(row, dict):
+            errors = {'non_field_errors': ['Expected an object.']}
+        else:
+            try:
+                row = serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                errors = exc.detail
+            else:
+                valid[row['name']] = row
+                continue
+        result.invalid += 1
+        if len(result.errors) < MAX_REPORTED_ERRORS:
+            result.errors.append({'row': first_row + offset, 'errors': errors})
+    if not valid:
+        return
+
+    for attempt in range(MenuItem.SLUG_ATTEMPTS):
+        chunk_categories = dict(categories)
+        try:
+            with transaction.atomic():
+                created = _upsert_items(restaurant, valid, chunk_categories)
+        except IntegrityError:
+            # A concurrent import took one of the slugs since they were
+            # looked up; retry with the slugs taken by now, like MenuItem.save
+            if attempt + 1 == MenuItem.SLUG_ATTEMPTS:
+                raise
+        else:
+            break
+    categories.update(chunk_categories)
+    result.created += created
+    result.updated += len(valid) - created
+
+
+def _upsert_items(restaurant, valid, categories):
+    """Upsert the validated rows of a chunk; return how many items are new."""
+    _ensure_categories(restaurant, valid.values(), categories)
+
+    # One query tells which rows are updates and which slugs are taken
+    existing = set(
+        MenuItem.objects.filter(restaurant=restaurant, name__in=valid).values_list('name', flat=True)
+    )
+    new_items = {
+        name: MenuItem(restaurant=restaurant, name=name).make_base_slug()
+        for name in valid if name not in existing
+    }
+    taken = _taken_slugs(new_items.values())
+
+    now = timezone.now()
+    objs = []
+    for name, row in valid.items():
+        row = dict(row)
+        category_name = row.pop('category')
+        item = MenuItem(
+            restaurant=restaurant,
+            category_id=categories.get(category_name) if category_name else None,
+            updated_at=now,
+            **row
+        )
+        if name in new_items:
+            slug = new_items[name]
+            if slug in taken:
+                slug = MenuItem.make_slug_with_suffix(slug)
+            taken.add(slug)
+            item.slug = slug
+        objs.append(item)
+
+    MenuItem.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=['name', 'restaurant'],
+        update_fields=list(UPSERT_UPDATE_FIELDS),
+    )
+    return len(new_items)
+
+
+def _taken_slugs(slugs):
+    return set(MenuItem.objects.filter(slug__in=list(slugs)).values_list('slug', flat=True))
+
+
+def _ensure_categories(restaurant, rows, categories):
+    """Create any categories referenced by ``rows`` that do not exist yet."""
+    missing = {row['category'] for row in rows if row['category'] and row['category'] not in categories}
+    if not missing:
+        return
+    MenuCategory.objects.bulk_create(
+        [MenuCategory(restaurant=restaurant, name=name) for name in missing],
+        ignore_conflicts=True,
+    )
+    categories.update(
+        MenuCategory.objects.filter(restaurant=restaurant, name__in=missing).values_list('name', 'id')
+    )
+
+
+def export_menu(restaurant_id, file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the menu of a restaurant as CSV or JSON Lines text chunks."""
+    queryset = MenuItem.objects.filter(
+        restaurant_id=restaurant_id
+    ).order_by('id').values_list(
+        *[('category__name' if name == 'category' else name) for name in MENU_FIELDS]
+    )
+
+    if file_format == 'jsonl':
+        for values in queryset.iterator(chunk_size=chunk_size):
+            row = dict(zip(MENU_FIELDS, values))
+            row['price'] = str(row['price'])
+            yield json.dumps(row) + '\n'
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(MENU_FIELDS)
+    for values in queryset.iterator(chunk_size=chunk_size):
+        writer.writerow(values)
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,35 @@
+import os
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .snapshots import is_snapshot_cache_shared
+
+
+def runs_several_processes():
+    """Whether the deployment is configured for more than one process."""
+    # WEB_CONCURRENCY is the worker count read by Gunicorn and Uvicorn
+    try:
+        workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    except ValueError:
+        workers = 1
+    return workers > 1 or bool(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+@register(Tags.caches)
+def check_menu_version_cache(app_configs, **kwargs):
+    """Warn when several processes would keep menu versions in process-local caches."""
+    if is_snapshot_cache_shared() or not runs_several_processes():
+        return []
+    alias = getattr(settings, 'MENU_SNAPSHOT_CACHE', 'default')
+    return [
+        Warning(
+            f"MENU_SNAPSHOT_CACHE ('{alias}') is a process-local cache.",
+            hint=(
+                "Menu changes only invalidate the menu snapshots and order pricing of the process that "
+                "made them; other processes notice after MENU_VERSION_TIMEOUT and MENU_STATE_MAX_AGE. "
+                "Use a shared cache backend when running several processes."
+            ),
+            id='menu.W001',
+        )
+    ]
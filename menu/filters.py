@@ -0,0 +1,30 @@
+from rest_framework import filters
+from rest_framework.settings import api_settings
+from .search import search_menu_items, search_terms, supports_full_text_search
+
+class MenuItemSearchFilter(filters.SearchFilter):
+    """
+    Search menu items through the full-text index (see ``menu.search``).
+    
+    Results are ranked by relevance unless the request asks for an ordering,
+    so the backend goes after ``OrderingFilter``. Databases without a
+    full-text index keep ``SearchFilter``'s icontains lookups.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        if not supports_full_text_search(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+        
+        terms = search_terms(request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+        
+        # Narrow the search inside the index when the list is for one restaurant
+        restaurant_id = request.query_params.get('restaurant_id') or request.query_params.get('restaurant')
+        if not str(restaurant_id or '').isdigit():
+            restaurant_id = None
+        queryset = search_menu_items(queryset, terms, restaurant_id)
+        
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by('search_rank', 'name')
+        return queryset
@@ -0,0 +1,153 @@
+"""
+Resized JPEG and WebP variants of menu item images.
+
+Saving a menu item with a new image schedules its variants once the upload
+is committed. Encoding runs in a pool of ``MENU_IMAGE_WORKERS`` processes
+(0 encodes inline), so upload requests never wait for it; the workers only
+read and write files, the database is updated from the parent process.
+Variant files are named after a hash of their content, so they can be
+cached forever. ``MenuItem.image_variants`` records them together with the
+image they were made from, and variants of a replaced image are not served.
+"""
+import hashlib
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from PIL import Image, ImageOps
+
+from .models import MenuItem
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIRECTORY = 'menu_items/variants'
+
+# Format key: (Pillow format, file extension, encoder options)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_image_storage():
+    return MenuItem._meta.get_field('image').storage
+
+
+def get_variant_widths():
+    return getattr(settings, 'MENU_IMAGE_VARIANT_WIDTHS', (160, 320, 640, 1280))
+
+
+def get_worker_count():
+    return getattr(settings, 'MENU_IMAGE_WORKERS', 2)
+
+
+def render_variants(source_name):
+    """
+    Encode and store the variants of the image ``source_name``.
+
+    Return ``{'source': source_name, format: {width: file name}}``. Runs in
+    the worker processes, so it must not use the database.
+    """
+    storage = get_image_storage()
+    with storage.open(source_name) as stream:
+        image = ImageOps.exif_transpose(Image.open(stream))
+        image.load()
+
+    # Never upscale; an image narrower than every width gets one variant
+    widths = sorted({min(width, image.width) for width in get_variant_widths()})
+    variants = {'source': source_name}
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for key, (image_format, extension, options) in VARIANT_FORMATS.items():
+            encoded = encode(resized, image_format, options)
+            digest = hashlib.sha256(encoded).hexdigest()[:20]
+            name = f'{VARIANT_DIRECTORY}/{digest}-{width}w.{extension}'
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(encoded))
+            variants.setdefault(key, {})[str(width)] = name
+    return variants
+
+
+def encode(image, image_format, options):
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def store_variants(item_id, variants):
+    """Record ``variants`` on the menu item, unless its image was replaced meanwhile."""
+    # Imported here: snapshots renders srcsets with this module
+    from .snapshots import bump_menu_version
+
+    # A conditional update rather than a save of a loaded item, so nothing
+    # else of the row is written back; the image check is part of the UPDATE
+    items = MenuItem.objects.filter(pk=item_id, image=variants['source'])
+    restaurant_id = items.values_list('restaurant_id', flat=True).first()
+    if restaurant_id is not None and items.update(image_variants=variants):
+        # Cached snapshots get the variants
+        bump_menu_version(restaurant_id)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned rather than forked: web servers run threads, forking them is unsafe
+            _executor = ProcessPoolExecutor(
+                max_workers=get_worker_count(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+    return _executor
+
+
+def schedule_image_variants(item_id, source_name):
+    """Generate the variants of a menu item's image in the background."""
+    if get_worker_count() == 0:
+        store_variants(item_id, render_variants(source_name))
+        return
+    future = get_executor().submit(render_variants, source_name)
+    future.add_done_callback(partial(_variants_done, item_id, source_name, threading.get_ident()))
+
+
+def _variants_done(item_id, source_name, scheduling_thread, future):
+    try:
+        store_variants(item_id, future.result())
+    except Exception:
+        logger.exception('Could not create the image variants of menu item %s (%s)', item_id, source_name)
+    finally:
+        # Usually called from the pool's management thread, which must not keep a connection open
+        if threading.get_ident() != scheduling_thread:
+            connections.close_all()
+
+
+def variant_urls(variants, image_name, request=None):
+    """
+    Return the variant URLs of the current image as ``{format: {'320w': url}}``,
+    or None while they are not ready.
+    """
+    if not image_name or not variants or variants.get('source') != image_name:
+        return None
+    storage = get_image_storage()
+    urls = {}
+    for key in VARIANT_FORMATS:
+        urls[key] = {}
+        for width, name in variants.get(key, {}).items():
+            url = storage.url(name)
+            urls[key][f'{width}w'] = request.build_absolute_uri(url) if request is not None else url
+    return urls
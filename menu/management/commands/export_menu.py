@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from menu.bulk import FORMATS, export_menu
+
+
+class Command(BaseCommand):
+    help = 'Stream the menu items of a restaurant as CSV or JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant_id', type=int, help='Primary key of the restaurant.')
+        parser.add_argument('--format', choices=FORMATS, default='csv', help='Output format.')
+        parser.add_argument('--output', help='Output file (defaults to stdout).')
+
+    def handle(self, *args, **options):
+        chunks = export_menu(options['restaurant_id'], options['format'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as stream:
+                stream.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
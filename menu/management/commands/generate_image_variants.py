@@ -0,0 +1,39 @@
+from concurrent.futures import as_completed
+from functools import partial
+
+from django.core.management.base import BaseCommand
+
+from menu.images import get_executor, get_worker_count, render_variants, store_variants
+from menu.models import MenuItem
+
+
+class Command(BaseCommand):
+    help = 'Create the missing resized variants of menu item images, e.g. for images uploaded before the pipeline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', type=int, help='Only the menu items of this restaurant.')
+        parser.add_argument('--force', action='store_true', help='Recreate the variants of every image.')
+
+    def handle(self, *args, **options):
+        items = MenuItem.objects.exclude(image='').exclude(image__isnull=True)
+        if options['restaurant']:
+            items = items.filter(restaurant_id=options['restaurant'])
+        pending = [
+            (pk, image) for pk, image, variants in items.values_list('pk', 'image', 'image_variants').iterator()
+            if options['force'] or variants.get('source') != image
+        ]
+
+        failed = 0
+        if get_worker_count() == 0:
+            # Encode one image at a time in this process
+            results = ((pk, image, partial(render_variants, image)) for pk, image in pending)
+        else:
+            futures = {get_executor().submit(render_variants, image): (pk, image) for pk, image in pending}
+            results = ((*futures[future], future.result) for future in as_completed(futures))
+        for pk, image, result in results:
+            try:
+                store_variants(pk, result())
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f'Menu item {pk} ({image}): {exc}')
+        self.stdout.write(f'Created the variants of {len(pending) - failed} images, {failed} failed.')
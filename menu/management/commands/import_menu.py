@@ -0,0 +1,39 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Restaurant
+from menu.bulk import DEFAULT_CHUNK_SIZE, FORMATS, detect_format, import_menu, iter_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk upsert menu items for a restaurant from a CSV or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant_id', type=int, help='Primary key of the restaurant.')
+        parser.add_argument('path', help="Input file, or '-' to read from stdin.")
+        parser.add_argument('--format', choices=FORMATS, help='Input format (guessed from the file name by default).')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows written per batch.')
+
+    def handle(self, *args, **options):
+        try:
+            restaurant = Restaurant.objects.get(pk=options['restaurant_id'])
+        except Restaurant.DoesNotExist:
+            raise CommandError(f"Restaurant {options['restaurant_id']} does not exist.")
+
+        path = options['path']
+        file_format = options['format'] or detect_format(path)
+
+        if path == '-':
+            result = import_menu(restaurant, iter_rows(sys.stdin, file_format), options['chunk_size'])
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                result = import_menu(restaurant, iter_rows(stream, file_format), options['chunk_size'])
+
+        for error in result.errors:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.rows} rows in {result.elapsed:.2f}s ({result.rows_per_second:.0f} rows/s): "
+            f"{result.created} created, {result.updated} updated, {result.invalid} invalid"
+        ))
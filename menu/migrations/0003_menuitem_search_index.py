@@ -0,0 +1,96 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The schema as of this migration, inlined so later changes to menu.search
+# cannot alter it; menu.search reinstalls missing triggers after migrate
+SQLITE_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS menu_menuitem_search USING fts5(
+        name, description, restaurant_id, content='menu_menuitem', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS menu_menuitem_search_insert AFTER INSERT ON menu_menuitem BEGIN
+        INSERT INTO menu_menuitem_search (rowid, name, description, restaurant_id)
+        VALUES (new.id, new.name, new.description, new.restaurant_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS menu_menuitem_search_delete AFTER DELETE ON menu_menuitem BEGIN
+        INSERT INTO menu_menuitem_search (menu_menuitem_search, rowid, name, description, restaurant_id)
+        VALUES ('delete', old.id, old.name, old.description, old.restaurant_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS menu_menuitem_search_update
+    AFTER UPDATE OF name, description, restaurant_id ON menu_menuitem BEGIN
+        INSERT INTO menu_menuitem_search (menu_menuitem_search, rowid, name, description, restaurant_id)
+        VALUES ('delete', old.id, old.name, old.description, old.restaurant_id);
+        INSERT INTO menu_menuitem_search (rowid, name, description, restaurant_id)
+        VALUES (new.id, new.name, new.description, new.restaurant_id);
+    END
+    """,
+    "INSERT INTO menu_menuitem_search (menu_menuitem_search) VALUES ('rebuild')",
+    "INSERT INTO menu_menuitem_search (menu_menuitem_search, rank) VALUES ('rank', 'bm25(5.0, 1.0, 0.0)')",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS menu_menuitem_search_insert",
+    "DROP TRIGGER IF EXISTS menu_menuitem_search_delete",
+    "DROP TRIGGER IF EXISTS menu_menuitem_search_update",
+    "DROP TABLE IF EXISTS menu_menuitem_search",
+]
+
+POSTGRESQL_SCHEMA = [
+    """
+    ALTER TABLE menu_menuitem ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS menuitem_search_vector_idx ON menu_menuitem USING GIN (search_vector)",
+]
+
+POSTGRESQL_DROP = [
+    "DROP INDEX IF EXISTS menuitem_search_vector_idx",
+    "ALTER TABLE menu_menuitem DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_for_vendor(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def create_search_index(apps, schema_editor):
+    run_for_vendor(schema_editor, {"sqlite": SQLITE_SCHEMA, "postgresql": POSTGRESQL_SCHEMA})
+
+
+def drop_search_index(apps, schema_editor):
+    run_for_vendor(schema_editor, {"sqlite": SQLITE_DROP, "postgresql": POSTGRESQL_DROP})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menu", "0002_menuitem_access_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MenuItemSearchIndex",
+            fields=[
+                ("item", models.OneToOneField(db_column="rowid", on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name="search_index", serialize=False, to="menu.menuitem")),
+                ("document", models.TextField(db_column="menu_menuitem_search")),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "menu_menuitem_search",
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
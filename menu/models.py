@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils.crypto import get_random_string
 from django.utils.text import slugify
 from accounts.models import Restaurant
 
@@ -25,6 +26,9 @@ class MenuCategory(models.Model):
 
 class MenuItem(models.Model):
     """Model representing a single menu item in a restaurant's menu."""
+    SLUG_SUFFIX_LENGTH = 6
+    SLUG_ATTEMPTS = 5
+    
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -41,6 +45,8 @@ class MenuItem(models.Model):
         related_name='menu_items'
     )
     image = models.ImageField(upload_to='menu_items/', blank=True, null=True)
+    # Resized copies of the image, filled in the background by menu.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_vegetarian = models.BooleanField(default=False)
     is_vegan = models.BooleanField(default=False)
     is_gluten_free = models.BooleanField(default=False)
@@ -54,19 +60,45 @@ class MenuItem(models.Model):
     class Meta:
         ordering = ['category__name', 'name']
         unique_together = ('name', 'restaurant')
+        indexes = [
+            # Menu browsing filters by restaurant, availability and category
+            models.Index(fields=['restaurant', 'is_available', 'category'], name='menuitem_browse_idx'),
+            # Price range filters, with and without a restaurant
+            models.Index(fields=['restaurant', 'price'], name='menuitem_restaurant_price_idx'),
+            models.Index(fields=['price'], name='menuitem_price_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.restaurant.name}"
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(f"{self.restaurant.name} {self.name}")
-            self.slug = base_slug
-            counter = 1
-            while MenuItem.objects.filter(slug=self.slug).exists():
-                self.slug = f"{base_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        
+        # Optimistically take the plain slug and only look it up after the
+        # unique constraint rejects it, so the common case costs no query
+        # and concurrent creates cannot both claim the same slug.
+        base_slug = self.make_base_slug()
+        self.slug = base_slug
+        for attempt in range(self.SLUG_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt + 1 == self.SLUG_ATTEMPTS or not MenuItem.objects.filter(slug=self.slug).exists():
+                    raise
+                self.slug = self.make_slug_with_suffix(base_slug)
+    
+    def make_base_slug(self):
+        """Return the slug derived from the restaurant and item names."""
+        max_length = self._meta.get_field('slug').max_length - self.SLUG_SUFFIX_LENGTH - 1
+        return slugify(f"{self.restaurant.name} {self.name}")[:max_length].rstrip('-')
+    
+    @classmethod
+    def make_slug_with_suffix(cls, base_slug):
+        """Return ``base_slug`` with a short random suffix to avoid collisions."""
+        suffix = get_random_string(cls.SLUG_SUFFIX_LENGTH, 'abcdefghijklmnopqrstuvwxyz0123456789')
+        return f"{base_slug}-{suffix}"
 
     @property
     def display_price(self):
@@ -79,3 +111,24 @@ class MenuItem(models.Model):
         if self.image and hasattr(self.image, 'url'):
             return self.image.url
         return '/static/images/default-food.jpg'  # You'll need to set up this default image
+
+
+class MenuItemSearchIndex(models.Model):
+    """
+    Full-text index of the menu items on SQLite, an FTS5 table maintained by
+    triggers (see ``menu.search``). Only used to join the index in searches.
+    """
+    item = models.OneToOneField(
+        MenuItem,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='search_index'
+    )
+    # The hidden column named after the table, matched against search queries
+    document = models.TextField(db_column='menu_menuitem_search')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'menu_menuitem_search'
@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from accounts.authentication import get_restaurant_pk
 
 class IsRestaurantOwnerOrReadOnly(permissions.BasePermission):
     """
@@ -13,7 +14,7 @@ class IsRestaurantOwnerOrReadOnly(permissions.BasePermission):
             return True
         
         # For POST, PUT, PATCH, DELETE, ensure user has restaurant profile
-        return request.user.is_authenticated and hasattr(request.user, 'restaurant_profile')
+        return get_restaurant_pk(request.user) is not None
     
     def has_object_permission(self, request, view, obj):
         # Allow GET, HEAD, OPTIONS requests for all authenticated users
@@ -21,6 +22,5 @@ class IsRestaurantOwnerOrReadOnly(permissions.BasePermission):
             return True
         
         # Only allow restaurant owners to modify their own menu items
-        return (request.user.is_authenticated and 
-                hasattr(request.user, 'restaurant_profile') and 
-                obj.restaurant == request.user.restaurant_profile)
+        restaurant_pk = get_restaurant_pk(request.user)
+        return restaurant_pk is not None and obj.restaurant_id == restaurant_pk
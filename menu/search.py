@@ -0,0 +1,122 @@
+"""
+Full-text search of menu items.
+
+SQLite: ``menu_menuitem_search`` is an FTS5 index of the name, description
+and restaurant id of ``menu_menuitem`` (an external content table, so the
+text is not stored twice). Triggers keep it in sync on every insert, update
+and delete, including bulk imports. SQLite drops the triggers whenever a
+migration rebuilds the table, so ``install_search_index`` runs after every
+migrate and rebuilds the index when they were missing. Matches are ranked
+with bm25, the name weighing more than the description.
+
+PostgreSQL: a generated ``search_vector`` tsvector column with a GIN index,
+ranked with ``ts_rank``.
+
+Every search term is prefix-matched and all terms must match. Restricting
+the search to a restaurant happens inside the index, so its cost depends
+on the matches rather than on the size of the whole catalogue.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F
+from django.db.models.expressions import RawSQL
+
+from .models import MenuItem, MenuItemSearchIndex
+
+SEARCH_TABLE = MenuItemSearchIndex._meta.db_table
+ITEM_TABLE = MenuItem._meta.db_table
+TERM_RE = re.compile(r'\w+')
+MAX_TERMS = 8
+
+SQLITE_TRIGGERS = {
+    f'{SEARCH_TABLE}_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON {ITEM_TABLE} BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, name, description, restaurant_id)
+            VALUES (new.id, new.name, new.description, new.restaurant_id);
+        END
+    """,
+    f'{SEARCH_TABLE}_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON {ITEM_TABLE} BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, name, description, restaurant_id)
+            VALUES ('delete', old.id, old.name, old.description, old.restaurant_id);
+        END
+    """,
+    f'{SEARCH_TABLE}_update': f"""
+        CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update
+        AFTER UPDATE OF name, description, restaurant_id ON {ITEM_TABLE} BEGIN
+            INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, name, description, restaurant_id)
+            VALUES ('delete', old.id, old.name, old.description, old.restaurant_id);
+            INSERT INTO {SEARCH_TABLE} (rowid, name, description, restaurant_id)
+            VALUES (new.id, new.name, new.description, new.restaurant_id);
+        END
+    """,
+}
+
+POSTGRESQL_SCHEMA = [
+    f"""
+        ALTER TABLE {ITEM_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+            || setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+        ) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS menuitem_search_vector_idx ON {ITEM_TABLE} USING GIN (search_vector)",
+]
+
+
+def supports_full_text_search(using):
+    return connections[using].vendor in ('sqlite', 'postgresql')
+
+
+def install_search_index(using):
+    """Create the search index of the database if missing; safe to run repeatedly."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                f"name, description, restaurant_id, content='{ITEM_TABLE}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [ITEM_TABLE]
+            )
+            missing = set(SQLITE_TRIGGERS) - {name for name, in cursor.fetchall()}
+            if not missing:
+                return
+            for name in missing:
+                cursor.execute(SQLITE_TRIGGERS[name])
+            # Changes made while the triggers were missing are not indexed
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')")
+            # Name matches count five times as much as description matches
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25(5.0, 1.0, 0.0)')")
+        elif connection.vendor == 'postgresql':
+            for statement in POSTGRESQL_SCHEMA:
+                cursor.execute(statement)
+
+
+def search_terms(query):
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def search_menu_items(queryset, terms, restaurant_id=None):
+    """
+    Filter ``queryset`` to the menu items matching every term as a prefix.
+
+    The items get a ``search_rank`` annotation; lower is a better match.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        # Quoted, the terms cannot be read as FTS5 operators
+        match = '{name description} : (%s)' % ' '.join(f'"{term}"*' for term in terms)
+        if restaurant_id is not None:
+            match = f'restaurant_id : "{int(restaurant_id)}" AND {match}'
+        # "=" on the column named after an FTS5 table is a full-text MATCH
+        return queryset.filter(search_index__document=match).annotate(search_rank=F('search_index__rank'))
+
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    return queryset.filter(
+        RawSQL(f"{ITEM_TABLE}.search_vector @@ to_tsquery('simple', %s)", (tsquery,), output_field=BooleanField())
+    ).annotate(
+        search_rank=RawSQL(f"-ts_rank({ITEM_TABLE}.search_vector, to_tsquery('simple', %s))", (tsquery,))
+    )
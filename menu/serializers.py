@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from accounts.authentication import get_restaurant_pk
+from .images import variant_urls
 from .models import MenuCategory, MenuItem
 
 class MenuCategorySerializer(serializers.ModelSerializer):
@@ -10,17 +12,18 @@ class MenuCategorySerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         # Set the restaurant to the current user's restaurant profile
         user = self.context['request'].user
-        validated_data['restaurant'] = user.restaurant_profile
+        validated_data['restaurant_id'] = get_restaurant_pk(user)
         return super().create(validated_data)
 
 class MenuItemSerializer(serializers.ModelSerializer):
     category_name = serializers.ReadOnlyField(source='category.name')
     image_url = serializers.ReadOnlyField()
+    image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = MenuItem
         fields = ('id', 'name', 'description', 'price', 'display_price', 'category', 
-                  'category_name', 'restaurant', 'image', 'image_url', 'is_vegetarian', 
+                  'category_name', 'restaurant', 'image', 'image_url', 'image_srcset', 'is_vegetarian', 
                   'is_vegan', 'is_gluten_free', 'is_available', 'preparation_time', 
                   'calories', 'slug', 'created_at', 'updated_at')
         read_only_fields = ('restaurant', 'display_price', 'slug', 'created_at', 'updated_at')
@@ -28,12 +31,55 @@ class MenuItemSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         # Set the restaurant to the current user's restaurant profile
         user = self.context['request'].user
-        validated_data['restaurant'] = user.restaurant_profile
+        validated_data['restaurant_id'] = get_restaurant_pk(user)
         return super().create(validated_data)
     
+    def update(self, instance, validated_data):
+        # Save only the submitted fields: a full save would write back the
+        # image variants loaded with the item over those stored meanwhile
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+    
+    def get_image_srcset(self, obj):
+        # None until the background worker has made the variants of this image
+        return variant_urls(obj.image_variants, obj.image.name, self.context.get('request'))
+    
     def validate_category(self, value):
         # Ensure the category belongs to the restaurant
         user = self.context['request'].user
-        if hasattr(user, 'restaurant_profile') and value.restaurant != user.restaurant_profile:
+        restaurant_pk = get_restaurant_pk(user)
+        if value is not None and restaurant_pk is not None and value.restaurant_id != restaurant_pk:
             raise serializers.ValidationError("This category does not belong to your restaurant.")
         return value
+
+class MenuItemImportSerializer(serializers.Serializer):
+    """
+    Validates one row of a bulk menu import.
+    
+    Deliberately not a ModelSerializer: the unique (name, restaurant) check is
+    done per batch by the importer instead of one query per row.
+    """
+    name = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, allow_null=True, default=None)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    category = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True, default=None)
+    is_vegetarian = serializers.BooleanField(required=False, default=False)
+    is_vegan = serializers.BooleanField(required=False, default=False)
+    is_gluten_free = serializers.BooleanField(required=False, default=False)
+    is_available = serializers.BooleanField(required=False, default=True)
+    preparation_time = serializers.IntegerField(required=False, min_value=0, default=15)
+    calories = serializers.IntegerField(required=False, min_value=0, allow_null=True, default=None)
+
+class MenuItemQuerySerializer(serializers.Serializer):
+    """Query parameters accepted by the async menu item list."""
+    restaurant = serializers.IntegerField(required=False)
+    restaurant_id = serializers.IntegerField(required=False)
+    category = serializers.IntegerField(required=False)
+    is_vegetarian = serializers.BooleanField(required=False, allow_null=True, default=None)
+    is_vegan = serializers.BooleanField(required=False, allow_null=True, default=None)
+    is_gluten_free = serializers.BooleanField(required=False, allow_null=True, default=None)
+    is_available = serializers.BooleanField(required=False, allow_null=True, default=None)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import MenuCategory, MenuItem
+from .images import schedule_image_variants
+from .snapshots import bump_menu_version
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=MenuCategory)
+@receiver(post_delete, sender=MenuCategory)
+def invalidate_menu_snapshot(sender, instance, **kwargs):
+    """
+    Signal to invalidate the cached menu of a restaurant when one of its
+    items or categories changes. The version is bumped after commit so a
+    concurrent reader cannot cache uncommitted data under the new version.
+    """
+    restaurant_id = instance.restaurant_id
+    transaction.on_commit(lambda: bump_menu_version(restaurant_id))
+
+@receiver(post_save, sender=MenuItem)
+def derive_image_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Signal to generate the resized variants of a newly uploaded menu item
+    image. Scheduled after commit, so the worker can see the saved file name.
+    Saves leaving the image out do not look at the (possibly stale) variants.
+    """
+    if raw or (update_fields is not None and 'image' not in update_fields):
+        return
+    if not instance.image or instance.image_variants.get('source') == instance.image.name:
+        return
+    item_id, source_name = instance.pk, instance.image.name
+    transaction.on_commit(lambda: schedule_image_variants(item_id, source_name))
@@ -0,0 +1,106 @@
+"""
+Prebuilt, versioned JSON snapshots of a restaurant's full menu.
+
+Each restaurant has a version token in the cache that is replaced whenever
+one of its menu items or categories changes. Snapshots are stored under
+``(restaurant, version)``, so a version bump is all it takes to invalidate
+them. The ETag of a snapshot is a hash of its content, so it only changes
+when the menu does, whichever process built it.
+
+Every process must see the same versions, so ``MENU_SNAPSHOT_CACHE`` should
+be a shared backend (Redis, Memcached, database); there, versions never
+expire. In a process-local cache they expire after ``MENU_VERSION_TIMEOUT``
+seconds, which bounds how long a process can keep serving a menu replaced
+by another one; ``menu.checks`` warns when that is likely to matter.
+"""
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import Restaurant
+from .models import MenuCategory, MenuItem
+from .fast_serializers import FastMenuItemSerializer
+from .serializers import MenuCategorySerializer
+
+
+def get_snapshot_cache():
+    """Return the cache backend configured by ``MENU_SNAPSHOT_CACHE``."""
+    return caches[getattr(settings, 'MENU_SNAPSHOT_CACHE', 'default')]
+
+
+def is_snapshot_cache_shared():
+    """Return whether the other processes see the menu versions of this one."""
+    return not isinstance(get_snapshot_cache(), LocMemCache)
+
+
+def get_version_timeout():
+    """Versions last until replaced, unless the cache is process-local."""
+    if is_snapshot_cache_shared():
+        return None
+    return getattr(settings, 'MENU_VERSION_TIMEOUT', 60)
+
+
+def _version_key(restaurant_id):
+    return f'menu:version:{restaurant_id}'
+
+
+def _snapshot_key(restaurant_id, version):
+    return f'menu:snapshot:{restaurant_id}:{version}'
+
+
+def get_menu_version(restaurant_id):
+    """Return the current menu version of a restaurant, creating one if needed."""
+    cache = get_snapshot_cache()
+    key = _version_key(restaurant_id)
+    version = cache.get(key)
+    if version is None:
+        # add() keeps the first token if several requests race here
+        cache.add(key, uuid4().hex, timeout=get_version_timeout())
+        version = cache.get(key)
+    return version
+
+
+def bump_menu_version(restaurant_id):
+    """Invalidate every cached snapshot of a restaurant's menu."""
+    get_snapshot_cache().set(_version_key(restaurant_id), uuid4().hex, timeout=get_version_timeout())
+
+
+def build_menu_snapshot(restaurant_id):
+    """Serialize all categories and items of a restaurant into JSON bytes."""
+    if not Restaurant.objects.filter(pk=restaurant_id).exists():
+        raise Restaurant.DoesNotExist
+
+    categories = MenuCategory.objects.filter(restaurant_id=restaurant_id).order_by('name')
+    items = FastMenuItemSerializer.project(
+        MenuItem.objects.filter(restaurant_id=restaurant_id).order_by('category__name', 'name')
+    )
+    return JSONRenderer().render({
+        'restaurant': restaurant_id,
+        'categories': MenuCategorySerializer(categories, many=True).data,
+        'items': FastMenuItemSerializer(items).data,
+    })
+
+
+def snapshot_etag(snapshot):
+    return f'"{hashlib.blake2b(snapshot, digest_size=16).hexdigest()}"'
+
+
+def get_menu_snapshot(restaurant_id, version):
+    """
+    Return ``(etag, snapshot)`` for ``version``, building and caching it on a miss.
+
+    A hit costs no query, so revalidations of an unchanged menu do not touch
+    the database.
+    """
+    cache = get_snapshot_cache()
+    key = _snapshot_key(restaurant_id, version)
+    entry = cache.get(key)
+    if entry is None:
+        snapshot = build_menu_snapshot(restaurant_id)
+        entry = (snapshot_etag(snapshot), snapshot)
+        cache.set(key, entry, timeout=getattr(settings, 'MENU_SNAPSHOT_TIMEOUT', 60 * 60 * 24))
+    return entry
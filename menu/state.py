@@ -0,0 +1,92 @@
+"""
+Per-process cache of the prices and availability of restaurant menus.
+
+Order placement needs the price and availability of a handful of items of
+one restaurant. Menus are small and change rarely, so each process keeps
+``{item id: MenuItemState}`` per restaurant, tagged with the menu version
+from ``menu.snapshots``. The ``MenuItem`` signals bump that version after
+every committed change, which makes the next lookup reload the menu with
+one query; until then lookups cost no query at all. The number of cached
+restaurants is bounded by ``MENU_STATE_CACHE_SIZE`` with LRU eviction.
+
+The version only reaches other processes through a shared cache backend.
+With a process-local one, entries are also reloaded once older than
+``MENU_STATE_MAX_AGE`` seconds, which bounds how long a stale price is served.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+from .models import MenuItem
+from .snapshots import get_menu_version, is_snapshot_cache_shared
+
+MenuItemState = namedtuple('MenuItemState', ['price', 'is_available'])
+
+
+def load_menu_state(restaurant_id):
+    """Read the price and availability of every item of a restaurant."""
+    return {
+        pk: MenuItemState(price, is_available)
+        for pk, price, is_available in MenuItem.objects.filter(
+            restaurant_id=restaurant_id
+        ).values_list('pk', 'price', 'is_available')
+    }
+
+
+class MenuStateCache:
+    """Thread-safe LRU of restaurant menu states, validated against the menu version."""
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_max_size(self):
+        if self.max_size is not None:
+            return self.max_size
+        return getattr(settings, 'MENU_STATE_CACHE_SIZE', 256)
+
+    def get_max_age(self):
+        if is_snapshot_cache_shared():
+            # Every change reaches this process as a new version
+            return None
+        return getattr(settings, 'MENU_STATE_MAX_AGE', 30)
+
+    def get(self, restaurant_id, refresh=False):
+        """Return ``{item id: MenuItemState}`` for the restaurant's current menu."""
+        # Read the version before the rows: a change committed in between is
+        # then either in the rows or announced by a newer version
+        version = get_menu_version(restaurant_id)
+        now = time.monotonic()
+        max_age = self.get_max_age()
+        if not refresh:
+            with self._lock:
+                entry = self._entries.get(restaurant_id)
+                if (
+                    entry is not None and entry[0] == version
+                    and (max_age is None or now - entry[1] < max_age)
+                ):
+                    self._entries.move_to_end(restaurant_id)
+                    return entry[2]
+
+        items = load_menu_state(restaurant_id)
+        with self._lock:
+            self._entries[restaurant_id] = (version, now, items)
+            self._entries.move_to_end(restaurant_id)
+            while len(self._entries) > self.get_max_size():
+                self._entries.popitem(last=False)
+        return items
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+menu_state_cache = MenuStateCache()
+
+
+def get_menu_state(restaurant_id, refresh=False):
+    """Return the cached ``{item id: MenuItemState}`` of a restaurant."""
+    return menu_state_cache.get(restaurant_id, refresh=refresh)
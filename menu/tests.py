@@ -0,0 +1,305 @@
+import os
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.testing import api_client, create_restaurant
+from .bulk import _taken_slugs, import_menu
+from .checks import check_menu_version_cache
+from .fast_serializers import FastMenuItemSerializer
+from .images import store_variants
+from .models import MenuCategory, MenuItem
+from .search import search_menu_items, search_terms
+from .serializers import MenuItemSerializer
+from .snapshots import bump_menu_version, get_menu_version, get_version_timeout
+from .state import MenuStateCache
+
+
+class FastMenuItemSerializerTests(TestCase):
+    """FastMenuItemSerializer renders exactly what MenuItemSerializer renders."""
+
+    @classmethod
+    def setUpTestData(cls):
+        restaurant = create_restaurant()
+        category = MenuCategory.objects.create(restaurant=restaurant, name='Mains')
+        MenuItem.objects.create(
+            restaurant=restaurant, category=category, name='Curry', description='Mild',
+            price=Decimal('12.5'), calories=640, preparation_time=20, is_vegetarian=True
+        )
+        # No category, no image
+        MenuItem.objects.create(restaurant=restaurant, name='Water', price=Decimal('1'))
+        # An image with its variants, and one whose variants are of a replaced image
+        with_variants = MenuItem.objects.create(restaurant=restaurant, category=category, name='Salad', price=Decimal('7.99'))
+        stale_variants = MenuItem.objects.create(restaurant=restaurant, name='Soup', price=Decimal('4.25'))
+        variants = {
+            'source': 'menu_items/salad.png',
+            'webp': {'160': 'menu_items/variants/abc-160w.webp', '320': 'menu_items/variants/abc-320w.webp'},
+            'jpeg': {'160': 'menu_items/variants/def-160w.jpg', '320': 'menu_items/variants/def-320w.jpg'},
+        }
+        # update() leaves the image variant signal out of the test
+        MenuItem.objects.filter(pk=with_variants.pk).update(image='menu_items/salad.png', image_variants=variants)
+        MenuItem.objects.filter(pk=stale_variants.pk).update(image='menu_items/soup.png', image_variants=variants)
+
+    def render_both(self, context):
+        queryset = MenuItem.objects.select_related('category').order_by('id')
+        expected = MenuItemSerializer(queryset, many=True, context=context).data
+        fast = FastMenuItemSerializer(FastMenuItemSerializer.project(queryset), context=context).data
+        return JSONRenderer().render(fast), JSONRenderer().render(expected)
+
+    def test_same_output_with_request(self):
+        request = Request(APIRequestFactory().get('/api/menu/items/'))
+        fast, expected = self.render_both({'request': request})
+        self.assertEqual(fast, expected)
+        # Absolute image and variant URLs, formatted decimals, no category
+        self.assertIn(b'"image":"http://testserver/media/menu_items/salad.png"', fast)
+        self.assertIn(b'"160w":"http://testserver/media/menu_items/variants/abc-160w.webp"', fast)
+        self.assertIn(b'"image_srcset":null', fast)
+        self.assertIn(b'"price":"12.50"', fast)
+        self.assertIn(b'"category":null', fast)
+
+    def test_same_output_without_request(self):
+        fast, expected = self.render_both({})
+        self.assertEqual(fast, expected)
+        self.assertIn(b'"image":"/media/menu_items/salad.png"', fast)
+
+    def test_same_datetimes_in_another_timezone(self):
+        request = Request(APIRequestFactory().get('/api/menu/items/'))
+        with timezone.override('Asia/Kolkata'):
+            fast, expected = self.render_both({'request': request})
+        self.assertEqual(fast, expected)
+        self.assertIn(b'+05:30"', fast)
+
+
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class MenuSnapshotViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = create_restaurant()
+        cls.item = MenuItem.objects.create(restaurant=cls.restaurant, name='Curry', price=Decimal('10.00'))
+        cls.url = f'/api/menu/restaurants/{cls.restaurant.pk}/snapshot/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = api_client(self.restaurant.user)
+        # Warm the user's active flag
+        self.client.get(self.url)
+
+    def test_revalidation_of_a_cached_snapshot_runs_no_query(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_follows_the_content_not_the_version(self):
+        etag = self.client.get(self.url)['ETag']
+        # A new version with the same content, as after a version expired
+        bump_menu_version(self.restaurant.pk)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+
+        MenuItem.objects.filter(pk=self.item.pk).update(price=Decimal('12.00'))
+        bump_menu_version(self.restaurant.pk)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class MenuVersionCacheTests(TestCase):
+    @override_settings(MENU_VERSION_TIMEOUT=60, MENU_STATE_MAX_AGE=30)
+    def test_only_process_local_versions_expire(self):
+        self.assertEqual((get_version_timeout(), MenuStateCache().get_max_age()), (60, 30))
+        with override_settings(CACHES=SHARED_CACHES, MENU_SNAPSHOT_CACHE='shared'):
+            self.assertEqual((get_version_timeout(), MenuStateCache().get_max_age()), (None, None))
+
+    def test_process_local_cache_warns_only_for_several_processes(self):
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '1'}):
+            self.assertEqual(check_menu_version_cache(None), [])
+            with override_settings(DATABASE_REPLICAS=['replica']):
+                self.assertEqual([warning.id for warning in check_menu_version_cache(None)], ['menu.W001'])
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '4'}):
+            self.assertEqual([warning.id for warning in check_menu_version_cache(None)], ['menu.W001'])
+            with override_settings(CACHES=SHARED_CACHES, MENU_SNAPSHOT_CACHE='shared'):
+                self.assertEqual(check_menu_version_cache(None), [])
+
+
+class MenuStateCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = create_restaurant()
+        cls.item = MenuItem.objects.create(restaurant=cls.restaurant, name='Curry', price=Decimal('10.00'))
+
+    def setUp(self):
+        self.cache = MenuStateCache()
+
+    def change_price_elsewhere(self, price):
+        # As another process would: no version bump reaches this process
+        MenuItem.objects.filter(pk=self.item.pk).update(price=price)
+
+    @override_settings(MENU_STATE_MAX_AGE=30)
+    def test_entries_are_reloaded_once_too_old(self):
+        with mock.patch('menu.state.time.monotonic', return_value=1000.0):
+            self.assertEqual(self.cache.get(self.restaurant.pk)[self.item.pk].price, Decimal('10.00'))
+            self.change_price_elsewhere(Decimal('12.00'))
+        with mock.patch('menu.state.time.monotonic', return_value=1029.0), self.assertNumQueries(0):
+            self.assertEqual(self.cache.get(self.restaurant.pk)[self.item.pk].price, Decimal('10.00'))
+        with mock.patch('menu.state.time.monotonic', return_value=1030.0):
+            self.assertEqual(self.cache.get(self.restaurant.pk)[self.item.pk].price, Decimal('12.00'))
+
+    def test_version_bump_reloads_at_once(self):
+        self.cache.get(self.restaurant.pk)
+        self.change_price_elsewhere(Decimal('12.00'))
+        bump_menu_version(self.restaurant.pk)
+        self.assertEqual(self.cache.get(self.restaurant.pk)[self.item.pk].price, Decimal('12.00'))
+
+
+class ImageVariantsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = create_restaurant()
+        cls.item = MenuItem.objects.create(restaurant=cls.restaurant, name='Salad', price=Decimal('7.99'))
+        MenuItem.objects.filter(pk=cls.item.pk).update(image='menu_items/salad.png')
+
+    def setUp(self):
+        self.variants = {'source': 'menu_items/salad.png', 'webp': {'160': 'menu_items/variants/abc-160w.webp'}}
+
+    def test_update_keeps_variants_stored_after_the_item_was_loaded(self):
+        item = MenuItem.objects.get(pk=self.item.pk)
+        # The background worker finishes while the owner's update is under way
+        store_variants(item.pk, self.variants)
+        serializer = MenuItemSerializer(item, data={'price': '8.50'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with mock.patch('menu.signals.schedule_image_variants') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                serializer.save()
+        schedule.assert_not_called()
+        item.refresh_from_db()
+        self.assertEqual((item.price, item.image_variants), (Decimal('8.50'), self.variants))
+
+    def test_variants_of_a_replaced_image_are_dropped(self):
+        version = get_menu_version(self.restaurant.pk)
+        store_variants(self.item.pk, {**self.variants, 'source': 'menu_items/old.png'})
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.image_variants, {})
+        self.assertEqual(get_menu_version(self.restaurant.pk), version)
+        store_variants(self.item.pk, self.variants)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.image_variants, self.variants)
+        self.assertNotEqual(get_menu_version(self.restaurant.pk), version)
+
+
+class MenuImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = create_restaurant()
+
+    def test_rows_matching_an_item_update_it(self):
+        result = import_menu(self.restaurant, [
+            {'name': 'Curry', 'price': '10.00', 'category': 'Mains'},
+            {'name': 'Soup', 'price': '4.00'},
+        ])
+        self.assertEqual((result.created, result.updated, result.invalid), (2, 0, 0))
+        slug = MenuItem.objects.get(name='Curry').slug
+
+        result = import_menu(self.restaurant, [
+            {'name': 'Curry', 'price': '11.50', 'category': 'Specials', 'is_vegan': 'true'},
+            {'name': 'Bread', 'price': '2.00', 'category': 'Mains'},
+        ])
+        self.assertEqual((result.created, result.updated), (1, 1))
+        curry = MenuItem.objects.select_related('category').get(name='Curry')
+        self.assertEqual((curry.price, curry.category.name, curry.is_vegan, curry.slug), (Decimal('11.50'), 'Specials', True, slug))
+        self.assertEqual(MenuItem.objects.count(), 3)
+        self.assertEqual(set(MenuCategory.objects.values_list('name', flat=True)), {'Mains', 'Specials'})
+
+    def test_rows_are_imported_in_chunks(self):
+        rows = [{'name': f'Dish {n}', 'price': str(n + 1)} for n in range(5)]
+        rows[3] = {'name': 'Dish 3', 'price': 'free'}
+        # A name repeated in a chunk keeps its last row
+        rows.append({'name': 'Dish 4', 'price': '9.00'})
+        # The categories, then per chunk the existing names, the taken slugs
+        # and the upsert in a savepoint
+        with self.assertNumQueries(1 + 3 * 5):
+            result = import_menu(self.restaurant, iter(rows), chunk_size=2)
+        self.assertEqual((result.rows, result.created, result.updated, result.invalid), (6, 4, 0, 1))
+        self.assertEqual(result.errors[0]['row'], 4)
+        self.assertEqual(MenuItem.objects.get(name='Dish 4').price, Decimal('9.00'))
+        self.assertFalse(MenuItem.objects.filter(name='Dish 3').exists())
+
+    def test_slug_taken_concurrently_is_retried(self):
+        other = create_restaurant(email='other@example.com', name='Other')
+        # Another import takes the slug between the lookup and the insert
+        MenuItem.objects.create(restaurant=other, name='Kitchen Curry', price=Decimal('9.00'), slug='kitchen-curry')
+        stale = [set()]
+        lookup = lambda slugs: stale.pop() if stale else _taken_slugs(slugs)
+        with mock.patch('menu.bulk._taken_slugs', side_effect=lookup) as taken_slugs:
+            result = import_menu(self.restaurant, [{'name': 'Curry', 'price': '10.00'}])
+        self.assertEqual(taken_slugs.call_count, 2)
+        self.assertEqual(result.created, 1)
+        self.assertRegex(MenuItem.objects.get(restaurant=self.restaurant).slug, r'^kitchen-curry-[a-z0-9]{6}$')
+
+
+class MenuSearchTests(TestCase):
+    """The full-text index follows the menu items through its triggers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = create_restaurant()
+        cls.other = create_restaurant(email='other@example.com', name='Other')
+        cls.soup = MenuItem.objects.create(restaurant=cls.restaurant, name='Tomato soup', price=Decimal('4'))
+        cls.bread = MenuItem.objects.create(
+            restaurant=cls.restaurant, name='Bread', description='With tomato butter', price=Decimal('2')
+        )
+        cls.salad = MenuItem.objects.create(restaurant=cls.other, name='Tomato salad', price=Decimal('6'))
+
+    def search(self, query, restaurant_id=None):
+        queryset = search_menu_items(MenuItem.objects.all(), search_terms(query), restaurant_id)
+        return set(queryset.values_list('name', flat=True))
+
+    def test_insert_rename_and_delete_update_the_index(self):
+        item = MenuItem.objects.create(restaurant=self.restaurant, name='Lentil stew', price=Decimal('9'))
+        self.assertEqual(self.search('lentil'), {'Lentil stew'})
+        item.name = 'Bean stew'
+        item.save()
+        self.assertEqual(self.search('lentil'), set())
+        self.assertEqual(self.search('bean'), {'Bean stew'})
+        item.delete()
+        self.assertEqual(self.search('stew'), set())
+
+    def test_bulk_changes_update_the_index(self):
+        MenuItem.objects.bulk_create([MenuItem(restaurant=self.restaurant, name='Pea soup', price=Decimal('3'))])
+        MenuItem.objects.filter(pk=self.soup.pk).update(description='Slow roasted')
+        self.assertEqual(self.search('soup'), {'Tomato soup', 'Pea soup'})
+        self.assertEqual(self.search('roasted'), {'Tomato soup'})
+        MenuItem.objects.filter(restaurant=self.restaurant).delete()
+        self.assertEqual(self.search('tomato'), {'Tomato salad'})
+
+    def test_terms_match_as_prefixes_and_all_must_match(self):
+        self.assertEqual(self.search('tom'), {'Tomato soup', 'Bread', 'Tomato salad'})
+        self.assertEqual(self.search('tom sal'), {'Tomato salad'})
+        self.assertEqual(self.search('omato'), set())
+        # FTS5 operators are searched as plain words
+        self.assertEqual(self.search('tomato OR bread'), set())
+        self.assertEqual(self.search('"sou*'), {'Tomato soup'})
+
+    def test_restaurant_filter(self):
+        self.assertEqual(self.search('tomato', self.restaurant.pk), {'Tomato soup', 'Bread'})
+        self.assertEqual(self.search('tomato', self.other.pk), {'Tomato salad'})
+
+    def test_results_are_ranked_name_matches_first(self):
+        client = api_client(self.restaurant.user)
+        response = client.get('/api/menu/items/', {'search': 'tomato', 'restaurant_id': self.restaurant.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['name'] for item in response.data], ['Tomato soup', 'Bread'])
+        # An explicit ordering wins over the rank
+        response = client.get('/api/menu/items/', {'search': 'tomato', 'restaurant_id': self.restaurant.pk, 'ordering': 'name'})
+        self.assertEqual([item['name'] for item in response.data], ['Bread', 'Tomato soup'])
@@ -1,11 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register('categories', views.MenuCategoryViewSet)
 router.register('items', views.MenuItemViewSet)
 
 urlpatterns = [
+    path('restaurants/<int:restaurant_id>/snapshot/', views.MenuSnapshotView.as_view(), name='menu-snapshot'),
+    path('async/items/', async_views.menu_item_list, name='async-menu-item-list'),
+    path('async/items/<int:pk>/', async_views.menu_item_detail, name='async-menu-item-detail'),
     path('', include(router.urls)),
 ]
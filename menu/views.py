@@ -1,6 +1,20 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
+from accounts.authentication import get_restaurant_pk
+from accounts.models import Restaurant
+from restaurant_order_system.profiling import ProfiledViewMixin
+from .filters import MenuItemSearchFilter
 from .models import MenuCategory, MenuItem
+from .snapshots import get_menu_snapshot, get_menu_version
+from .fast_serializers import FastMenuItemSerializer
+from .bulk import FORMATS, detect_format, export_menu, import_menu, iter_rows, text_stream
 from .serializers import MenuCategorySerializer, MenuItemSerializer
 from .permissions import IsRestaurantOwnerOrReadOnly
 
@@ -26,12 +40,12 @@ class MenuCategoryViewSet(viewsets.ModelViewSet):
         
         return queryset
 
-class MenuItemViewSet(viewsets.ModelViewSet):
+class MenuItemViewSet(ProfiledViewMixin, viewsets.ModelViewSet):
     """API endpoint for menu items."""
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
     permission_classes = [permissions.IsAuthenticated, IsRestaurantOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, MenuItemSearchFilter]
     filterset_fields = ['category', 'is_vegetarian', 'is_vegan', 'is_gluten_free', 
                         'is_available', 'restaurant']
     search_fields = ['name', 'description']
@@ -40,7 +54,8 @@ class MenuItemViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filter menu items based on query parameters."""
-        queryset = MenuItem.objects.all()
+        # category_name is serialized for every item
+        queryset = MenuItem.objects.select_related('category')
         
         # Filter by restaurant if provided
         restaurant_id = self.request.query_params.get('restaurant_id')
@@ -57,3 +72,87 @@ class MenuItemViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(price__lte=max_price)
         
         return queryset
+    
+    def list(self, request, *args, **kwargs):
+        if self.get_serializer_class() is not MenuItemSerializer:
+            return super().list(request, *args, **kwargs)
+        
+        # Render the list from .values() rows, bypassing per-object DRF fields
+        queryset = FastMenuItemSerializer.project(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        serializer = self.profile_serializer(FastMenuItemSerializer(rows, context=self.get_serializer_context()))
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """Upsert the restaurant's menu items from an uploaded CSV or JSON Lines file."""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": ["No file was submitted."]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        file_format = request.data.get('file_format') or detect_format(upload.name, upload.content_type or '')
+        if file_format not in FORMATS:
+            return Response(
+                {"file_format": [f"Must be one of: {', '.join(FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        rows = iter_rows(text_stream(upload), file_format)
+        result = import_menu(request.user.restaurant_profile, rows)
+        return Response(result.as_dict())
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream a restaurant's menu items as CSV or JSON Lines."""
+        restaurant_id = request.query_params.get('restaurant_id')
+        if not restaurant_id:
+            restaurant_id = get_restaurant_pk(request.user)
+        if not str(restaurant_id or '').isdigit():
+            return Response(
+                {"restaurant_id": ["A valid restaurant id is required."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in FORMATS:
+            return Response(
+                {"file_format": [f"Must be one of: {', '.join(FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        content_type = 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(export_menu(restaurant_id, file_format), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="menu-{restaurant_id}.{file_format}"'
+        return response
+
+class MenuSnapshotView(APIView):
+    """
+    API endpoint returning a restaurant's whole menu as one cached JSON document.
+    
+    The response carries an ETag hashed from the snapshot, so clients
+    revalidating with If-None-Match get a 304 without touching the database
+    while the snapshot is cached.
+    Like the other menu endpoints it requires an authenticated user; JWT
+    roles come from the token claims, so authentication costs no query.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, restaurant_id):
+        try:
+            etag, snapshot = get_menu_snapshot(restaurant_id, get_menu_version(restaurant_id))
+        except Restaurant.DoesNotExist:
+            raise Http404("Restaurant not found.")
+        
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(snapshot, content_type='application/json')
+        
+        response['ETag'] = etag
+        # Only for authenticated users, so shared caches must not store it
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from .models import MenuItemDailySales, Order, OrderItem, RestaurantDailySales
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -11,4 +11,16 @@ class OrderAdmin(admin.ModelAdmin):
     list_filter = ('status', 'created_at')
     search_fields = ('customer__user__email', 'restaurant__name')
     inlines = [OrderItemInline]
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('total_amount', 'created_at', 'updated_at')
+
+@admin.register(RestaurantDailySales)
+class RestaurantDailySalesAdmin(admin.ModelAdmin):
+    list_display = ('restaurant', 'day', 'order_count', 'revenue')
+    list_filter = ('day',)
+    search_fields = ('restaurant__name',)
+
+@admin.register(MenuItemDailySales)
+class MenuItemDailySalesAdmin(admin.ModelAdmin):
+    list_display = ('menu_item', 'restaurant', 'day', 'quantity', 'order_count', 'revenue')
+    list_filter = ('day',)
+    search_fields = ('menu_item__name', 'restaurant__name')
@@ -0,0 +1,82 @@
+"""
+Async read-only order endpoints for ASGI deployments.
+
+They mirror the list and retrieve actions of OrderViewSet (same filters,
+ordering, cursor pagination and OrderSerializer output) but use the async
+ORM, so a slow client does not hold a worker thread while its response is
+produced.
+"""
+from collections import OrderedDict
+
+from django.http import HttpResponse
+from django_filters.utils import translate_validation
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from accounts.authentication import async_jwt_required, get_customer_pk, get_restaurant_pk
+from .filters import OrderFilter
+from .models import Order
+from .pagination import OrderCursorPagination
+from .permissions import IsCustomerOrRestaurantOwner
+from .serializers import OrderSerializer
+from .views import OrderViewSet
+
+
+def render_json(data, status=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+
+def get_order_queryset(user):
+    """Orders visible to ``user``, with everything OrderSerializer reads loaded up front."""
+    restaurant_pk = get_restaurant_pk(user)
+    customer_pk = get_customer_pk(user)
+    if restaurant_pk is not None:
+        queryset = Order.objects.filter(restaurant_id=restaurant_pk)
+    elif customer_pk is not None:
+        queryset = Order.objects.filter(customer_id=customer_pk)
+    else:
+        return Order.objects.none()
+    # The async ORM runs prefetch_related() like the sync one does
+    return OrderViewSet.optimize_for_serializer(queryset)
+
+
+@async_jwt_required
+async def order_list(request):
+    """Async variant of the order list (cursor pagination only)."""
+    filterset = OrderFilter(request.GET, queryset=get_order_queryset(request.user))
+    if not filterset.is_valid():
+        return render_json(translate_validation(filterset.errors).detail, status.HTTP_400_BAD_REQUEST)
+
+    paginator = OrderCursorPagination()
+    try:
+        page_queryset = paginator.get_page_queryset(filterset.qs, request)
+    except ValidationError as exc:
+        return render_json(exc.detail, status.HTTP_400_BAD_REQUEST)
+    except NotFound as exc:
+        return render_json({'detail': exc.detail}, status.HTTP_404_NOT_FOUND)
+    orders = paginator.set_page([order async for order in page_queryset])
+
+    return render_json(OrderedDict([
+        ('next', paginator.get_next_link()),
+        ('previous', paginator.get_previous_link()),
+        ('results', OrderSerializer(orders, many=True, context={'request': request}).data),
+    ]))
+
+
+@async_jwt_required
+async def order_detail(request, pk):
+    """Async variant of the order detail."""
+    try:
+        order = await get_order_queryset(request.user).aget(pk=pk)
+    except Order.DoesNotExist:
+        return render_json({'detail': 'No Order matches the given query.'}, status.HTTP_404_NOT_FOUND)
+
+    # Relations are joined in, so the object permission check runs no query
+    if not IsCustomerOrRestaurantOwner().has_object_permission(request, None, order):
+        return render_json(
+            {'detail': 'You do not have permission to perform this action.'},
+            status.HTTP_403_FORBIDDEN
+        )
+
+    return render_json(OrderSerializer(order, context={'request': request}).data)
@@ -0,0 +1,118 @@
+"""
+Publish/subscribe of order events for the real-time kitchen board.
+
+``Order.save`` publishes ``order.created`` and ``order.status_changed``
+events after commit; the server-sent events endpoint subscribes per
+restaurant. The broker class is chosen by the ``ORDER_EVENTS_BROKER``
+setting, so the in-process default can be swapped for one backed by an
+external message broker when running several worker processes.
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class OrderEventBroker:
+    """Interface of an order event broker."""
+
+    def publish(self, restaurant_id, event):
+        """Deliver ``event`` to every subscriber of ``restaurant_id``. Callable from sync code."""
+        raise NotImplementedError
+
+    def subscribe(self, restaurant_id):
+        """Return a subscription with an async ``get()`` and a ``close()`` method."""
+        raise NotImplementedError
+
+
+class Subscription:
+    """A bounded queue of events bound to the event loop that reads it."""
+
+    def __init__(self, broker, restaurant_id, maxsize):
+        self.broker = broker
+        self.restaurant_id = restaurant_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event):
+        # Runs on the subscriber's loop; a slow client loses its oldest events
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker(OrderEventBroker):
+    """
+    Broker that fans events out to subscribers in the current process.
+
+    Only suitable when a single process serves both writes and streams.
+    """
+    queue_size = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def publish(self, restaurant_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(restaurant_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The subscriber's loop is closed; it will unsubscribe itself
+                pass
+
+    def subscribe(self, restaurant_id):
+        subscription = Subscription(self, restaurant_id, self.queue_size)
+        with self._lock:
+            self._subscriptions.setdefault(restaurant_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.restaurant_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.restaurant_id]
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker configured by ``ORDER_EVENTS_BROKER``."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'ORDER_EVENTS_BROKER', 'orders.events.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def order_event(event_type, order, previous_status=None):
+    """Build the payload sent to subscribers for ``order``."""
+    return {
+        'type': event_type,
+        'order': order.pk,
+        'restaurant': order.restaurant_id,
+        'status': order.status,
+        'previous_status': previous_status,
+        'total_amount': f"{order.total_amount:.2f}",
+        'created_at': order.created_at.isoformat() if order.created_at else None,
+    }
+
+
+def publish_order_event(event_type, order, previous_status=None):
+    """Publish an order event to the subscribers of the order's restaurant."""
+    get_broker().publish(order.restaurant_id, order_event(event_type, order, previous_status))
@@ -0,0 +1,77 @@
+"""
+Streaming exports of orders and their items.
+
+Rows are produced from a single ``values_list`` query over orders LEFT JOIN
+order items, consumed with ``iterator(chunk_size=...)``, so memory stays
+flat whatever the date range.
+"""
+import csv
+import io
+import json
+
+DEFAULT_CHUNK_SIZE = 2000
+
+FORMATS = ('csv', 'jsonl')
+
+# (column name, queryset lookup) for one row per order item
+ORDER_EXPORT_COLUMNS = (
+    ('order_id', 'id'),
+    ('created_at', 'created_at'),
+    ('status', 'status'),
+    ('restaurant_id', 'restaurant_id'),
+    ('restaurant_name', 'restaurant__name'),
+    ('customer_email', 'customer__user__email'),
+    ('delivery_address', 'delivery_address'),
+    ('total_amount', 'total_amount'),
+    ('item_id', 'items__id'),
+    ('menu_item_id', 'items__menu_item_id'),
+    ('menu_item_name', 'items__menu_item__name'),
+    ('quantity', 'items__quantity'),
+    ('price', 'items__price'),
+)
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def iter_order_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one dict per order item (or per order without items)."""
+    names = [name for name, _ in ORDER_EXPORT_COLUMNS]
+    rows = queryset.order_by('created_at', 'id', 'items__id').values_list(
+        *[lookup for _, lookup in ORDER_EXPORT_COLUMNS]
+    )
+    for values in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(names, values))
+
+
+def _format_value(value):
+    if value is None:
+        return None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (bool, int, str)):
+        return value
+    return str(value)
+
+
+def export_orders(queryset, file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the rows of ``queryset`` as CSV or JSON Lines text chunks."""
+    rows = iter_order_rows(queryset, chunk_size)
+
+    if file_format == 'jsonl':
+        for row in rows:
+            yield json.dumps({key: _format_value(value) for key, value in row.items()}) + '\n'
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in ORDER_EXPORT_COLUMNS])
+    for row in rows:
+        writer.writerow([_format_value(value) for value in row.values()])
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
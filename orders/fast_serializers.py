@@ -0,0 +1,103 @@
+"""
+Fast read-only serialization of order lists.
+
+``FastOrderSerializer`` renders order rows fetched with ``.values()`` (plus
+one ``.values()`` query for all their items) into the exact structure
+``OrderSerializer(many=True).data`` produces, without instantiating models
+or nested serializers. Decimals and datetimes are formatted by the bound
+fields of the regular serializers, so the rendered JSON is byte-identical.
+"""
+from collections import defaultdict
+
+from rest_framework.serializers import ReturnList
+
+from menu.fast_serializers import compile_datetime_field
+from .models import Order, OrderItem
+from .serializers import OrderItemSerializer, OrderSerializer
+
+ORDER_VALUES = (
+    'id', 'customer_id', 'customer__user__email', 'customer__phone_number', 'customer__address',
+    'customer__created_at', 'customer__updated_at', 'restaurant_id', 'restaurant__name',
+    'status', 'delivery_address', 'special_instructions', 'total_amount', 'created_at', 'updated_at',
+)
+
+ORDER_ITEM_VALUES = (
+    'id', 'order_id', 'menu_item_id', 'menu_item__name', 'quantity', 'price', 'special_instructions',
+)
+
+STATUS_LABELS = dict(Order.STATUS_CHOICES)
+
+
+class FastOrderSerializer:
+    """Serialize ``.values(*ORDER_VALUES)`` rows like ``OrderSerializer``."""
+
+    def __init__(self, rows, context=None):
+        self.rows = rows
+        self.context = context or {}
+        fields = OrderSerializer(context=self.context).fields
+        customer_fields = fields['customer_details'].fields
+        item_fields = OrderItemSerializer(context=self.context).fields
+        self.total_amount = fields['total_amount'].to_representation
+        self.created_at = compile_datetime_field(fields['created_at'])
+        self.updated_at = compile_datetime_field(fields['updated_at'])
+        self.customer_created_at = compile_datetime_field(customer_fields['created_at'])
+        self.customer_updated_at = compile_datetime_field(customer_fields['updated_at'])
+        self.item_price = item_fields['price'].to_representation
+
+    @staticmethod
+    def project(queryset):
+        """Return ``queryset`` as the rows this serializer reads."""
+        return queryset.prefetch_related(None).values(*ORDER_VALUES)
+
+    @property
+    def data(self):
+        return ReturnList(self.to_representation(self.rows), serializer=self)
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        items = self.get_items([row['id'] for row in rows])
+        return [self.order(row, items[row['id']]) for row in rows]
+
+    def get_items(self, order_ids):
+        """Return the serialized items of ``order_ids``, grouped by order, in one query."""
+        items = defaultdict(list)
+        if not order_ids:
+            return items
+        rows = OrderItem.objects.filter(order_id__in=order_ids).order_by('id').values_list(*ORDER_ITEM_VALUES)
+        item_price = self.item_price
+        for pk, order_id, menu_item_id, menu_item_name, quantity, price, special_instructions in rows:
+            items[order_id].append({
+                'id': pk,
+                'menu_item': menu_item_id,
+                'menu_item_name': menu_item_name,
+                'quantity': quantity,
+                'price': item_price(price),
+                'special_instructions': special_instructions,
+                # Left as a Decimal, like the subtotal property, for the renderer
+                'subtotal': price * quantity,
+            })
+        return items
+
+    def order(self, row, items):
+        return {
+            'id': row['id'],
+            'customer': row['customer_id'],
+            'customer_details': {
+                'user': row['customer_id'],
+                'email': row['customer__user__email'],
+                'phone_number': row['customer__phone_number'],
+                'address': row['customer__address'],
+                'created_at': self.customer_created_at(row['customer__created_at']),
+                'updated_at': self.customer_updated_at(row['customer__updated_at']),
+            },
+            'restaurant': row['restaurant_id'],
+            'restaurant_name': row['restaurant__name'],
+            'status': row['status'],
+            'status_display': STATUS_LABELS.get(row['status'], row['status']),
+            'delivery_address': row['delivery_address'],
+            'special_instructions': row['special_instructions'],
+            'total_amount': self.total_amount(row['total_amount']),
+            'items': items,
+            'created_at': self.created_at(row['created_at']),
+            'updated_at': self.updated_at(row['updated_at']),
+        }
@@ -0,0 +1,11 @@
+import django_filters
+from .models import Order
+
+class OrderFilter(django_filters.FilterSet):
+    """Filters shared by the order list, exports and reports."""
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+    
+    class Meta:
+        model = Order
+        fields = ['status', 'created_after', 'created_before']
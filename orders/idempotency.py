@@ -0,0 +1,143 @@
+"""
+Idempotent POST requests through the ``Idempotency-Key`` header.
+
+The first request with a given key (per user) inserts an ``IdempotencyKey``
+row before doing any work; the unique ``(user, key)`` constraint makes
+concurrent duplicates fail that insert. The successful response is stored
+in the same transaction as the objects it created, and later requests with
+the same key get it replayed from a single indexed lookup. Keys expire
+after ``IDEMPOTENCY_KEY_TTL`` seconds and are purged by the
+``purge_idempotency_keys`` command.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+def get_key_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24))
+
+
+def get_lock_timeout():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_LOCK_TIMEOUT', 60))
+
+
+def request_fingerprint(data):
+    """Hash the parsed request data so a key reused for another payload is detected."""
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def in_progress_response():
+    return Response(
+        {"detail": f"A request with this {IDEMPOTENCY_HEADER} is still being processed."},
+        status=status.HTTP_409_CONFLICT
+    )
+
+
+def claim_key(user_id, key, request_hash):
+    """
+    Try to become the request that processes ``key``.
+
+    Return ``(record, None)`` when the caller owns the key and must do the
+    work, or ``(None, response)`` with the response to send instead.
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user_id=user_id, key=key, request_hash=request_hash), None
+        except IntegrityError:
+            pass
+
+        existing = IdempotencyKey.objects.filter(user_id=user_id, key=key).first()
+        if existing is None:
+            # Purged in the meantime; try to claim it again
+            continue
+
+        now = timezone.now()
+        expired = existing.created_at < now - get_key_ttl()
+        abandoned = not existing.is_complete and existing.created_at < now - get_lock_timeout()
+        if expired or abandoned:
+            if not reclaim_key(existing, request_hash):
+                return None, in_progress_response()
+            return existing, None
+
+        if existing.request_hash != request_hash:
+            return None, Response(
+                {"detail": f"This {IDEMPOTENCY_HEADER} was already used with a different request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if not existing.is_complete:
+            return None, in_progress_response()
+        response = Response(existing.response_body, status=existing.response_status)
+        response[REPLAYED_HEADER] = 'true'
+        return None, response
+
+    return None, in_progress_response()
+
+
+def reclaim_key(record, request_hash):
+    """
+    Take over the expired or abandoned ``record`` for a new request.
+
+    One conditional UPDATE: when several retries race, only the first still
+    matches the ``created_at`` they all read. Return whether it was taken.
+    """
+    now = timezone.now()
+    claimed = IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).update(
+        request_hash=request_hash, response_status=None, response_body=None, created_at=now
+    )
+    if claimed:
+        record.request_hash, record.created_at = request_hash, now
+        record.response_status = record.response_body = None
+    return bool(claimed)
+
+
+class IdempotentCreateMixin:
+    """
+    Make ``create`` idempotent for requests carrying an ``Idempotency-Key`` header.
+
+    Only successful responses are stored; when the create fails (including
+    validation errors) the key is released, so the client may retry it.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return super().create(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"The {IDEMPOTENCY_HEADER} header must be 1 to {MAX_KEY_LENGTH} characters long."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        record, response = claim_key(request.user.pk, key, request_fingerprint(request.data))
+        if response is not None:
+            return response
+
+        try:
+            with transaction.atomic():
+                response = super().create(request, *args, **kwargs)
+                # Store exactly what the client receives, as plain JSON
+                IdempotencyKey.objects.filter(pk=record.pk).update(
+                    response_status=response.status_code,
+                    response_body=json.loads(JSONRenderer().render(response.data)),
+                )
+        except Exception:
+            # Nothing was created; let the client retry with the same key
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            raise
+        return response
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDate
+
+from orders.models import MenuItemDailySales, Order, OrderItem, RestaurantDailySales
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the daily sales rollups from delivered orders, in chunks of orders. '
+        'Run it while no orders are being delivered, since the rollups are reset first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', type=int, help='Only rebuild the rollups of this restaurant.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Orders aggregated per transaction.')
+
+    def handle(self, *args, **options):
+        orders = Order.objects.filter(status='delivered')
+        restaurant_sales = RestaurantDailySales.objects.all()
+        item_sales = MenuItemDailySales.objects.all()
+        if options['restaurant']:
+            orders = orders.filter(restaurant_id=options['restaurant'])
+            restaurant_sales = restaurant_sales.filter(restaurant_id=options['restaurant'])
+            item_sales = item_sales.filter(restaurant_id=options['restaurant'])
+
+        # Orders delivered after this point are recorded by Order.save and the status transitions
+        max_id = orders.aggregate(max_id=Max('id'))['max_id'] or 0
+
+        with transaction.atomic():
+            restaurant_sales.delete()
+            item_sales.delete()
+
+        last_id = 0
+        processed = 0
+        while last_id < max_id:
+            chunk_ids = list(
+                orders.filter(id__gt=last_id, id__lte=max_id).order_by('id').values_list('id', flat=True)[:options['chunk_size']]
+            )
+            if not chunk_ids:
+                break
+            chunk = orders.filter(id__gt=last_id, id__lte=chunk_ids[-1])
+            with transaction.atomic():
+                self.aggregate_chunk(chunk)
+            last_id = chunk_ids[-1]
+            processed += len(chunk_ids)
+            self.stdout.write(f"{processed} orders aggregated (up to id {last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups from {processed} delivered orders."))
+
+    def aggregate_chunk(self, chunk):
+        per_day = chunk.annotate(day=TruncDate('created_at')).values('restaurant_id', 'day').annotate(
+            orders=Count('id'),
+            total=Sum('total_amount')
+        ).order_by()
+        for row in per_day:
+            RestaurantDailySales.add(row['restaurant_id'], row['day'], order_count=row['orders'], revenue=row['total'])
+
+        per_item = OrderItem.objects.filter(order__in=chunk).annotate(
+            day=TruncDate('order__created_at')
+        ).values('order__restaurant_id', 'menu_item_id', 'day').annotate(
+            orders=Count('order_id', distinct=True),
+            total_quantity=Sum('quantity'),
+            total=Sum(F('price') * F('quantity'))
+        ).order_by()
+        for row in per_item:
+            MenuItemDailySales.add(
+                row['order__restaurant_id'], row['menu_item_id'], row['day'],
+                order_count=row['orders'], quantity=row['total_quantity'], revenue=row['total']
+            )
@@ -0,0 +1,224 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections import deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.utils import timezone
+
+from accounts.models import Customer, Restaurant
+from accounts.serializers import CustomTokenObtainPairSerializer
+from menu.models import MenuItem
+from orders.models import Order
+from restaurant_order_system.profiling import percentile
+
+SCENARIOS = ('menu_browse', 'order_list', 'order_create', 'status_update')
+
+# Happy path an order is walked through by the status_update scenario
+STATUS_FLOW = ['pending', 'accepted', 'preparing', 'ready', 'delivered']
+
+
+class QueryCounter:
+    """Database execute wrapper counting the queries of a benchmark run."""
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the order and menu API hot paths in-process and write the results as JSON. '
+        'The order_create and status_update scenarios write to the database, so run it against '
+        'a disposable copy, e.g. one filled by generate_synthetic_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                            help='Scenario to run; repeat for several (default: all).')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per scenario.')
+        parser.add_argument('--users', type=int, default=20, help='Restaurants and customers to spread requests over.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--compare', help='Baseline JSON written by an earlier run.')
+        parser.add_argument('--max-regression', type=float, default=20.0,
+                            help='Fail when a p95 latency grows by more than this percentage over --compare.')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.load_actors(options['users'])
+        self.in_progress = deque()
+
+        results = {}
+        for name in options['scenario'] or SCENARIOS:
+            run = getattr(self, f'scenario_{name}')
+            for _ in range(options['warmup']):
+                run()
+            results[name] = self.measure(run, options['requests'])
+
+        report = {
+            'meta': self.environment(),
+            'options': {key: options[key] for key in ('requests', 'warmup', 'users', 'seed')},
+            'results': results,
+        }
+
+        self.stdout.write(
+            f"{'scenario':<14} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'errors':>7}"
+        )
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<14} {row['throughput']:>9.1f} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                f"{row['p99_ms']:>9.2f} {row['queries_per_request']:>8.1f} {row['errors']:>7}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump(report, stream, indent=2)
+        if options['compare']:
+            self.compare(results, options['compare'], options['max_regression'])
+
+    def load_actors(self, count):
+        restaurants = list(
+            Restaurant.objects.filter(menu_items__is_available=True).distinct().select_related('user').order_by('pk')[:count]
+        )
+        customers = list(Customer.objects.select_related('user').order_by('pk')[:count])
+        if not restaurants or not customers:
+            raise CommandError('Benchmarks need restaurants with menus and customers; run generate_synthetic_data first.')
+
+        self.restaurants = [(restaurant.pk, self.client_for(restaurant.user)) for restaurant in restaurants]
+        self.customers = [self.client_for(customer.user) for customer in customers]
+        self.restaurant_clients = dict(self.restaurants)
+        self.menus = {
+            restaurant.pk: list(
+                MenuItem.objects.filter(restaurant=restaurant, is_available=True).values_list('pk', flat=True)[:50]
+            )
+            for restaurant in restaurants
+        }
+
+    def client_for(self, user):
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        return Client(HTTP_AUTHORIZATION=f'Bearer {token}', raise_request_exception=False)
+
+    def scenario_menu_browse(self):
+        restaurant_id, client = self.random.choice(self.restaurants)
+        return client.get('/api/menu/items/', {'restaurant_id': restaurant_id, 'is_available': 'true'})
+
+    def scenario_order_list(self):
+        if self.random.random() < 0.5:
+            client = self.random.choice(self.restaurants)[1]
+        else:
+            client = self.random.choice(self.customers)
+        return client.get('/api/orders/')
+
+    def scenario_order_create(self):
+        restaurant_id = self.random.choice(list(self.menus))
+        menu = self.menus[restaurant_id]
+        items = [
+            {'menu_item': item_id, 'quantity': self.random.randint(1, 3)}
+            for item_id in self.random.sample(menu, min(len(menu), self.random.randint(1, 3)))
+        ]
+        return self.random.choice(self.customers).post('/api/orders/', {
+            'restaurant': restaurant_id,
+            'delivery_address': 'Benchmark address',
+            'items': items,
+        }, content_type='application/json')
+
+    def scenario_status_update(self):
+        order_id, restaurant_id, current = self.next_order_to_advance()
+        next_status = STATUS_FLOW[STATUS_FLOW.index(current) + 1]
+        response = self.restaurant_clients[restaurant_id].patch(
+            f'/api/orders/{order_id}/update_status/', {'status': next_status}, content_type='application/json'
+        )
+        if response.status_code == 200 and next_status != STATUS_FLOW[-1]:
+            # Queue the next step instead of re-reading the order
+            self.in_progress.append((order_id, restaurant_id, next_status))
+        return response
+
+    def next_order_to_advance(self):
+        if not self.in_progress:
+            self.in_progress.extend(self.load_in_progress())
+        if not self.in_progress:
+            # Nothing left to walk through: place a fresh order
+            self.scenario_order_create()
+            self.in_progress.extend(self.load_in_progress())
+        return self.in_progress.popleft()
+
+    def load_in_progress(self):
+        return Order.objects.filter(
+            restaurant_id__in=self.restaurant_clients, status__in=STATUS_FLOW[:-1]
+        ).order_by('-pk').values_list('pk', 'restaurant_id', 'status')[:500]
+
+    def measure(self, run, count):
+        latencies = []
+        errors = 0
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for db_connection in connections.all():
+                stack.enter_context(db_connection.execute_wrapper(counter))
+            for _ in range(count):
+                request_started = time.perf_counter()
+                response = run()
+                latencies.append(time.perf_counter() - request_started)
+                if response.status_code >= 400:
+                    errors += 1
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'requests': count,
+            'errors': errors,
+            'throughput': count / elapsed,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'mean_ms': statistics.fmean(latencies) * 1000,
+            'queries_per_request': counter.queries / count,
+        }
+
+    def environment(self):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'orders': Order.objects.count(),
+            'menu_items': MenuItem.objects.count(),
+        }
+
+    def compare(self, results, path, max_regression):
+        with open(path, encoding='utf-8') as stream:
+            baseline = json.load(stream)['results']
+
+        regressions = []
+        for name, row in results.items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            change = (row['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+            query_change = row['queries_per_request'] - before['queries_per_request']
+            self.stdout.write(
+                f"{name:<14} p95 {before['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms ({change:+.1f}%), "
+                f"queries {before['queries_per_request']:.1f} -> {row['queries_per_request']:.1f}"
+            )
+            if change > max_regression or query_change > 0.5:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(f"Regression against {path}: {', '.join(regressions)}")
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Restaurant
+from accounts.serializers import CustomTokenObtainPairSerializer
+from menu.models import MenuItem
+from orders.models import Order
+from restaurant_order_system.profiling import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput of the sync and async read endpoints by driving the '
+        'ASGI application in-process with many concurrent requests.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='User to authenticate as (defaults to the first restaurant owner).')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint and mode.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once.')
+        parser.add_argument('--client-delay', type=float, default=0.0,
+                            help='Seconds each simulated client waits before reading the body.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        restaurant = Restaurant.objects.select_related('user').order_by('pk')
+        if options['email']:
+            restaurant = restaurant.filter(user__email=options['email'])
+        restaurant = restaurant.first()
+        if restaurant is None:
+            raise CommandError('No restaurant user found; create some data first.')
+
+        token = str(CustomTokenObtainPairSerializer.get_token(restaurant.user).access_token)
+        menu_item = MenuItem.objects.filter(restaurant=restaurant).order_by('pk').first()
+        order = Order.objects.filter(restaurant=restaurant).order_by('pk').first()
+
+        endpoints = [
+            ('menu list', f'/api/menu/items/?restaurant_id={restaurant.pk}',
+             f'/api/menu/async/items/?restaurant_id={restaurant.pk}'),
+            ('order list', '/api/orders/', '/api/orders/async/'),
+            ('user type', '/api/accounts/user-type/', '/api/accounts/async/user-type/'),
+        ]
+        if menu_item is not None:
+            endpoints.append(('menu detail', f'/api/menu/items/{menu_item.pk}/',
+                              f'/api/menu/async/items/{menu_item.pk}/'))
+        if order is not None:
+            endpoints.append(('order detail', f'/api/orders/{order.pk}/', f'/api/orders/async/{order.pk}/'))
+
+        results = asyncio.run(self.run_all(endpoints, token, options))
+
+        self.stdout.write(f"{'endpoint':<14} {'mode':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for row in results:
+            self.stdout.write(
+                f"{row['endpoint']:<14} {row['mode']:<6} {row['throughput']:>9.1f} "
+                f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['errors']:>7}"
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump({'options': {key: options[key] for key in ('requests', 'concurrency', 'client_delay')},
+                           'results': results}, stream, indent=2)
+
+    async def run_all(self, endpoints, token, options):
+        application = get_asgi_application()
+        headers = [(b'authorization', f'Bearer {token}'.encode())]
+        results = []
+        for label, sync_path, async_path in endpoints:
+            for mode, path in (('sync', sync_path), ('async', async_path)):
+                # Warm up caches and connections before measuring
+                await request(application, path, headers)
+                results.append(await self.run_endpoint(application, label, mode, path, headers, options))
+        return results
+
+    async def run_endpoint(self, application, label, mode, path, headers, options):
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        latencies = []
+        errors = 0
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                status = await request(application, path, headers, options['client_delay'])
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'endpoint': label,
+            'mode': mode,
+            'path': path,
+            'requests': options['requests'],
+            'errors': errors,
+            'throughput': options['requests'] / elapsed,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'mean_ms': statistics.fmean(latencies) * 1000,
+        }
+
+
+async def request(application, url, headers, client_delay=0.0):
+    """Send one GET through the ASGI application and return the status code."""
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': parts.path,
+        'raw_path': parts.path.encode(),
+        'query_string': parts.query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver'), *headers],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    disconnected = asyncio.Event()
+    sent_request = False
+    status = None
+
+    async def receive():
+        nonlocal sent_request
+        if not sent_request:
+            sent_request = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+            if client_delay:
+                # A slow client keeps the response open for a while
+                await asyncio.sleep(client_delay)
+
+    await application(scope, receive, send)
+    disconnected.set()
+    return status
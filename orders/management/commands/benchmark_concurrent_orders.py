@@ -0,0 +1,149 @@
+import multiprocessing
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+
+from accounts.models import Customer, Restaurant
+from accounts.serializers import CustomTokenObtainPairSerializer
+from menu.models import MenuItem
+from restaurant_order_system.profiling import percentile
+
+# Database settings of each profile, applied to a copy of the database
+PROFILES = {
+    'stock': {'ENGINE': 'django.db.backends.sqlite3', 'journal_mode': 'DELETE'},
+    'tuned': {'ENGINE': 'restaurant_order_system.sqlite_backend', 'journal_mode': 'WAL'},
+}
+
+
+def place_orders(results, barrier, tokens, menus, count, seed):
+    """Worker process: POST ``count`` orders as soon as every worker is ready."""
+    rng = random.Random(seed)
+    clients = [Client(HTTP_AUTHORIZATION=f'Bearer {token}', raise_request_exception=False) for token in tokens]
+    restaurant_ids = list(menus)
+    latencies, errors = [], 0
+    barrier.wait()
+    started = time.monotonic()
+    for _ in range(count):
+        restaurant_id = rng.choice(restaurant_ids)
+        menu = menus[restaurant_id]
+        items = [
+            {'menu_item': item_id, 'quantity': rng.randint(1, 3)}
+            for item_id in rng.sample(menu, min(len(menu), rng.randint(1, 3)))
+        ]
+        request_started = time.monotonic()
+        response = rng.choice(clients).post('/api/orders/', {
+            'restaurant': restaurant_id,
+            'delivery_address': 'Benchmark address',
+            'items': items,
+        }, content_type='application/json')
+        latencies.append(time.monotonic() - request_started)
+        if response.status_code != 201:
+            errors += 1
+    results.put({'started': started, 'finished': time.monotonic(), 'latencies': latencies, 'errors': errors})
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark concurrent order placement on SQLite: worker processes POST /api/orders/ in parallel '
+        'against a copy of the database, once per profile (stock settings and the tuned sqlite_backend). '
+        'Run it after generate_synthetic_data; the database itself is not modified.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4, help='Concurrent worker processes.')
+        parser.add_argument('--orders', type=int, default=100, help='Orders placed by each process.')
+        parser.add_argument('--users', type=int, default=20, help='Restaurants and customers to spread orders over.')
+        parser.add_argument('--profile', action='append', choices=PROFILES,
+                            help='Profile to run; repeat for several (default: all).')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        db_settings = connections.settings[DEFAULT_DB_ALIAS]
+        if db_settings['ENGINE'] not in {profile['ENGINE'] for profile in PROFILES.values()}:
+            raise CommandError('This benchmark needs a SQLite default database.')
+        tokens, menus = self.load_actors(options['users'])
+        original = {key: db_settings[key] for key in ('ENGINE', 'NAME')}
+
+        self.stdout.write(
+            f"{'profile':<8} {'orders/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+        )
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                for name in options['profile'] or PROFILES:
+                    path = Path(directory) / f'{name}.sqlite3'
+                    self.copy_database(original['NAME'], path, PROFILES[name]['journal_mode'])
+                    self.use_database(PROFILES[name]['ENGINE'], path)
+                    row = self.run_profile(tokens, menus, options)
+                    self.stdout.write(
+                        f"{name:<8} {row['throughput']:>9.1f} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                        f"{row['p99_ms']:>9.2f} {row['errors']:>7}"
+                    )
+        finally:
+            self.use_database(original['ENGINE'], original['NAME'])
+
+    def load_actors(self, count):
+        restaurants = list(
+            Restaurant.objects.filter(menu_items__is_available=True).distinct().order_by('pk')[:count]
+        )
+        customers = list(Customer.objects.select_related('user').order_by('pk')[:count])
+        if not restaurants or not customers:
+            raise CommandError('Benchmarks need restaurants with menus and customers; run generate_synthetic_data first.')
+
+        tokens = [str(CustomTokenObtainPairSerializer.get_token(customer.user).access_token) for customer in customers]
+        menus = {
+            restaurant.pk: list(
+                MenuItem.objects.filter(restaurant=restaurant, is_available=True).values_list('pk', flat=True)[:50]
+            )
+            for restaurant in restaurants
+        }
+        return tokens, menus
+
+    def copy_database(self, source, target, journal_mode):
+        connections.close_all()
+        source_db, target_db = sqlite3.connect(source), sqlite3.connect(target)
+        try:
+            source_db.backup(target_db)
+            target_db.execute(f'PRAGMA journal_mode = {journal_mode}')
+        finally:
+            source_db.close()
+            target_db.close()
+
+    def use_database(self, engine, name):
+        # Workers are forked after this, so they all open the new database
+        connections.close_all()
+        connections.settings[DEFAULT_DB_ALIAS].update(ENGINE=engine, NAME=name)
+        connections[DEFAULT_DB_ALIAS] = connections.create_connection(DEFAULT_DB_ALIAS)
+
+    def run_profile(self, tokens, menus, options):
+        context = multiprocessing.get_context('fork')
+        processes = options['processes']
+        results = context.Queue()
+        barrier = context.Barrier(processes)
+        workers = [
+            context.Process(target=place_orders, args=(
+                results, barrier, tokens, menus, options['orders'], options['seed'] + index
+            ))
+            for index in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        reports = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        latencies = sorted(latency for report in reports for latency in report['latencies'])
+        elapsed = max(report['finished'] for report in reports) - min(report['started'] for report in reports)
+        errors = sum(report['errors'] for report in reports)
+        return {
+            'throughput': (len(latencies) - errors) / elapsed,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'errors': errors,
+        }
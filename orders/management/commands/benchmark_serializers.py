@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from menu.fast_serializers import FastMenuItemSerializer
+from menu.models import MenuItem
+from menu.serializers import MenuItemSerializer
+from orders.fast_serializers import FastOrderSerializer
+from orders.models import Order
+from orders.serializers import OrderSerializer
+from orders.views import OrderViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the regular and fast list serializers of orders and menu items on pages of '
+        'existing rows: check that both render identical JSON and report the best time of each.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per page.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per serializer; the best one is kept.')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        orders = Order.objects.order_by('-created_at', '-id')
+        menu_items = MenuItem.objects.order_by('id')
+        if orders.count() < rows or menu_items.count() < rows:
+            raise CommandError(f'Need at least {rows} orders and menu items; run generate_synthetic_data first.')
+
+        cases = [
+            ('orders', lambda: OrderSerializer(list(OrderViewSet.optimize_for_serializer(orders)[:rows]), many=True),
+             lambda: FastOrderSerializer(list(FastOrderSerializer.project(orders)[:rows]))),
+            ('menu items', lambda: MenuItemSerializer(list(menu_items.select_related('category')[:rows]), many=True),
+             lambda: FastMenuItemSerializer(list(FastMenuItemSerializer.project(menu_items)[:rows]))),
+        ]
+        renderer = JSONRenderer()
+        for label, regular, fast in cases:
+            # Both timings include fetching the page, as in a list request
+            expected = renderer.render(regular().data)
+            if renderer.render(fast().data) != expected:
+                raise CommandError(f'The fast {label} serializer renders different JSON.')
+            regular_time = self.best_time(lambda: renderer.render(regular().data), options['repeat'])
+            fast_time = self.best_time(lambda: renderer.render(fast().data), options['repeat'])
+            self.stdout.write(
+                f"{label}: {rows} rows, {len(expected)} bytes, regular {regular_time * 1000:.1f} ms, "
+                f"fast {fast_time * 1000:.1f} ms ({regular_time / fast_time:.1f}x)"
+            )
+
+    def best_time(self, render, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,105 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import Customer, Restaurant, User
+from menu.models import MenuItem
+from menu.views import MenuCategoryViewSet, MenuItemViewSet
+from orders.models import Order, OrderItem
+from orders.views import OrderViewSet
+
+# Tables that grow without bound and must never be read with a full scan
+BIG_TABLES = (
+    Order._meta.db_table,
+    OrderItem._meta.db_table,
+    MenuItem._meta.db_table,
+)
+
+# Plan lines that indicate a full table scan, per database vendor
+SEQUENTIAL_SCAN_PATTERNS = {
+    'sqlite': r'\bSCAN (?:TABLE )?({tables})\b',
+    'postgresql': r'\bSeq Scan on ({tables})\b',
+    'mysql': r"\btype\W+ALL\b.*\b({tables})\b",
+}
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the ViewSet queries and fail when a big table is fully scanned.'
+
+    def handle(self, *args, **options):
+        pattern = SEQUENTIAL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"Unsupported database vendor '{connection.vendor}'.")
+        scan_re = re.compile(pattern.format(tables='|'.join(BIG_TABLES)))
+
+        failures = []
+        for label, queryset in self.get_querysets():
+            plan = self.explain(queryset)
+            self.stdout.write(f"== {label}\n{plan}\n")
+            if scan_re.search(plan):
+                failures.append(label)
+
+        if failures:
+            raise CommandError(
+                'Sequential scan on a big table in: ' + ', '.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS('No sequential scans on big tables.'))
+
+    def explain(self, queryset):
+        if connection.vendor != 'postgresql':
+            return queryset.explain()
+        # Small development databases make seq scans the cheapest plan;
+        # disable them so the check reports which indexes are usable.
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def get_querysets(self):
+        """Yield ``(label, queryset)`` pairs built from the real ViewSets."""
+        restaurant_user = User(pk=1, email='restaurant@example.com')
+        Restaurant(user=restaurant_user)
+        customer_user = User(pk=2, email='customer@example.com')
+        Customer(user=customer_user)
+        cursor_position = {'created_at__lte': timezone.now(), 'id__lt': 1000}
+
+        yield 'orders: restaurant feed', self.list_queryset(
+            OrderViewSet, restaurant_user
+        ).order_by('-created_at', '-id')[:51]
+        yield 'orders: restaurant feed, deep page', self.list_queryset(
+            OrderViewSet, restaurant_user
+        ).filter(**cursor_position).order_by('-created_at', '-id')[:51]
+        yield 'orders: kitchen board', self.list_queryset(
+            OrderViewSet, restaurant_user, {'status': 'pending'}
+        ).order_by('-created_at', '-id')[:51]
+        yield 'orders: customer history', self.list_queryset(
+            OrderViewSet, customer_user
+        ).order_by('-created_at', '-id')[:51]
+        yield 'orders: item prefetch', OrderItem.objects.filter(
+            order_id__in=[1, 2, 3]
+        ).select_related('menu_item')
+        yield 'menu items: restaurant menu', self.list_queryset(
+            MenuItemViewSet, customer_user,
+            {'restaurant_id': 1, 'is_available': 'true'}
+        ).filter(category_id=1)
+        yield 'menu items: price range', self.list_queryset(
+            MenuItemViewSet, customer_user,
+            {'restaurant_id': 1, 'min_price': '5', 'max_price': '20'}
+        )
+        yield 'menu items: price range, all restaurants', self.list_queryset(
+            MenuItemViewSet, customer_user, {'min_price': '5', 'max_price': '20'}
+        )
+        yield 'menu categories: restaurant', self.list_queryset(
+            MenuCategoryViewSet, customer_user, {'restaurant_id': 1}
+        )
+
+    def list_queryset(self, viewset_class, user, params=None):
+        """Return the filtered queryset a ViewSet would use for ``list``."""
+        view = viewset_class(action_map={'get': 'list'}, kwargs={}, format_kwarg=None)
+        request = view.initialize_request(APIRequestFactory().get('/', params or {}))
+        request.user = user
+        view.request = request
+        return view.filter_queryset(view.get_queryset())
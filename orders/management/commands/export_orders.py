@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.exports import DEFAULT_CHUNK_SIZE, FORMATS, export_orders
+from orders.filters import OrderFilter
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Stream orders and their items as CSV or JSON Lines without loading them into memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', type=int, help='Only export orders of this restaurant.')
+        parser.add_argument('--status', help='Only export orders with this status.')
+        parser.add_argument('--created-after', help='ISO 8601 lower bound on created_at (inclusive).')
+        parser.add_argument('--created-before', help='ISO 8601 upper bound on created_at (exclusive).')
+        parser.add_argument('--format', choices=FORMATS, default='csv', help='Output format.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows fetched per round trip.')
+        parser.add_argument('--output', help='Output file (defaults to stdout).')
+
+    def handle(self, *args, **options):
+        queryset = Order.objects.all()
+        if options['restaurant']:
+            queryset = queryset.filter(restaurant_id=options['restaurant'])
+
+        # Same filters as the order list endpoint
+        data = {
+            'status': options['status'],
+            'created_after': options['created_after'],
+            'created_before': options['created_before'],
+        }
+        filterset = OrderFilter({key: value for key, value in data.items() if value}, queryset=queryset)
+        if not filterset.is_valid():
+            raise CommandError(json.dumps(filterset.errors))
+
+        chunks = export_orders(filterset.qs, options['format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as stream:
+                stream.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,231 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.geo import encode_geohash
+from accounts.models import Customer, Restaurant, User
+from menu.models import MenuCategory, MenuItem
+from orders.models import Order, OrderItem
+
+CATEGORY_NAMES = ['Starters', 'Mains', 'Sides', 'Desserts', 'Drinks', 'Specials', 'Salads', 'Soups']
+DISH_WORDS = [
+    'Grilled', 'Spicy', 'Smoked', 'Crispy', 'Roasted', 'Garlic', 'Lemon', 'Herb',
+    'Chicken', 'Beef', 'Tofu', 'Salmon', 'Mushroom', 'Paneer', 'Lamb', 'Prawn',
+    'Burger', 'Curry', 'Wrap', 'Bowl', 'Pasta', 'Pizza', 'Tacos', 'Noodles',
+]
+# Mostly finished orders, with a tail still in progress
+STATUS_WEIGHTS = {
+    'delivered': 78, 'cancelled': 7, 'pending': 4, 'accepted': 3,
+    'preparing': 3, 'ready': 2, 'out_for_delivery': 3,
+}
+# Restaurants are spread over roughly 40 x 30 km around this point
+CITY_CENTRE = (51.5074, -0.1278)
+CITY_SPREAD = (0.18, 0.22)
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """Let bulk inserts set ``auto_now``/``auto_now_add`` fields explicitly."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate synthetic restaurants, menus, customers and orders with bulk inserts, '
+        'for benchmarks and query plan checks. Users are named <prefix>-restaurant-<n>@example.com '
+        'and <prefix>-customer-<n>@example.com and share one password.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=10)
+        parser.add_argument('--menu-items', type=int, default=50, help='Menu items per restaurant.')
+        parser.add_argument('--categories', type=int, default=5, help='Menu categories per restaurant.')
+        parser.add_argument('--customers', type=int, default=1000)
+        parser.add_argument('--orders', type=int, default=10000)
+        parser.add_argument('--max-items-per-order', type=int, default=4)
+        parser.add_argument('--days', type=int, default=90, help='Spread orders over this many past days.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Orders inserted per transaction.')
+        parser.add_argument('--prefix', default='synthetic', help='Email and name prefix of the generated data.')
+        parser.add_argument('--password', default='benchmark', help='Password of every generated user.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible data sets.')
+        parser.add_argument('--skip-rollups', action='store_true', help='Do not rebuild the daily sales rollups.')
+
+    def handle(self, *args, **options):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError('The database must return primary keys from bulk inserts.')
+        if User.objects.filter(email__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(f"Data with prefix '{options['prefix']}' already exists; choose another --prefix.")
+
+        self.random = random.Random(options['seed'])
+        self.now = timezone.now()
+        started = time.perf_counter()
+
+        with manual_timestamps(User, Restaurant, Customer, MenuCategory, MenuItem, Order):
+            restaurants = self.create_restaurants(options)
+            customer_ids = self.create_customers(options)
+            menus = self.create_menus(restaurants, options)
+            order_count, item_count = self.create_orders(menus, customer_ids, options)
+
+        if not options['skip_rollups']:
+            call_command('backfill_sales_rollups', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(restaurants)} restaurants, {sum(len(items) for items in menus.values())} menu items, "
+            f"{len(customer_ids)} customers, {order_count} orders and {item_count} order items "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def create_users(self, kind, count, options):
+        # Hashing once keeps user creation from being dominated by the hasher
+        password = make_password(options['password'])
+        emails = [f"{options['prefix']}-{kind}-{n}@example.com" for n in range(1, count + 1)]
+        users = User.objects.bulk_create(
+            [User(email=email, password=password, date_joined=self.now) for email in emails],
+            batch_size=options['batch_size']
+        )
+        return [user.pk for user in users]
+
+    def create_restaurants(self, options):
+        user_ids = self.create_users('restaurant', options['restaurants'], options)
+        restaurants = Restaurant.objects.bulk_create([
+            Restaurant(
+                user_id=user_id,
+                name=f"{options['prefix'].title()} Kitchen {n}",
+                location=f"{self.random.randint(1, 999)} Market Street",
+                # bulk_create skips save(), so the geohash is set here
+                **self.random_coordinates(),
+                created_at=self.now,
+                updated_at=self.now,
+            )
+            for n, user_id in enumerate(user_ids, start=1)
+        ], batch_size=options['batch_size'])
+        self.stdout.write(f"{len(restaurants)} restaurants")
+        return restaurants
+
+    def random_coordinates(self):
+        latitude, longitude = (
+            round(Decimal(centre + self.random.uniform(-spread, spread)), 6)
+            for centre, spread in zip(CITY_CENTRE, CITY_SPREAD)
+        )
+        return {'latitude': latitude, 'longitude': longitude, 'geohash': encode_geohash(latitude, longitude)}
+
+    def create_customers(self, options):
+        user_ids = self.create_users('customer', options['customers'], options)
+        Customer.objects.bulk_create([
+            Customer(
+                user_id=user_id,
+                address=f"{self.random.randint(1, 999)} Elm Road",
+                created_at=self.now,
+                updated_at=self.now,
+            )
+            for user_id in user_ids
+        ], batch_size=options['batch_size'])
+        self.stdout.write(f"{len(user_ids)} customers")
+        return user_ids
+
+    def create_menus(self, restaurants, options):
+        """Create categories and items; return ``{restaurant_id: [(item_id, price), ...]}``."""
+        category_names = [
+            CATEGORY_NAMES[n % len(CATEGORY_NAMES)] + (f' {n // len(CATEGORY_NAMES) + 1}' if n >= len(CATEGORY_NAMES) else '')
+            for n in range(options['categories'])
+        ]
+        categories = MenuCategory.objects.bulk_create([
+            MenuCategory(restaurant=restaurant, name=name, created_at=self.now, updated_at=self.now)
+            for restaurant in restaurants for name in category_names
+        ], batch_size=options['batch_size'])
+        categories_by_restaurant = {}
+        for category in categories:
+            categories_by_restaurant.setdefault(category.restaurant_id, []).append(category.pk)
+
+        items = []
+        for restaurant in restaurants:
+            for n in range(1, options['menu_items'] + 1):
+                item = MenuItem(
+                    restaurant=restaurant,
+                    name=f"{self.random.choice(DISH_WORDS)} {self.random.choice(DISH_WORDS)} {n}",
+                    description='Synthetic menu item.',
+                    price=Decimal(self.random.randrange(300, 3500)) / 100,
+                    category_id=self.random.choice(categories_by_restaurant.get(restaurant.pk) or [None]),
+                    is_vegetarian=self.random.random() < 0.3,
+                    is_available=self.random.random() < 0.9,
+                    preparation_time=self.random.choice([5, 10, 15, 20, 30]),
+                    calories=self.random.randrange(150, 1200),
+                    created_at=self.now,
+                    updated_at=self.now,
+                )
+                item.slug = item.make_base_slug()
+                items.append(item)
+        items = MenuItem.objects.bulk_create(items, batch_size=options['batch_size'])
+        self.stdout.write(f"{len(categories)} menu categories, {len(items)} menu items")
+
+        menus = {}
+        for item in items:
+            menus.setdefault(item.restaurant_id, []).append((item.pk, item.price))
+        return menus
+
+    def create_orders(self, menus, customer_ids, options):
+        restaurant_ids = [restaurant_id for restaurant_id, items in menus.items() if items]
+        if not restaurant_ids or not customer_ids:
+            return 0, 0
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        span = timedelta(days=options['days']).total_seconds()
+        rng = self.random
+
+        total_orders = total_items = 0
+        remaining = options['orders']
+        while remaining > 0:
+            batch_size = min(remaining, options['batch_size'])
+            orders, order_lines = [], []
+            for _ in range(batch_size):
+                restaurant_id = rng.choice(restaurant_ids)
+                lines = [
+                    (item_id, price, rng.randint(1, 3))
+                    for item_id, price in rng.sample(
+                        menus[restaurant_id], min(len(menus[restaurant_id]), rng.randint(1, options['max_items_per_order']))
+                    )
+                ]
+                created_at = self.now - timedelta(seconds=rng.random() * span)
+                orders.append(Order(
+                    customer_id=rng.choice(customer_ids),
+                    restaurant_id=restaurant_id,
+                    status=rng.choices(statuses, weights)[0],
+                    delivery_address='Synthetic address',
+                    total_amount=sum(price * quantity for _, price, quantity in lines),
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+                order_lines.append(lines)
+
+            with transaction.atomic():
+                orders = Order.objects.bulk_create(orders)
+                items = [
+                    OrderItem(order_id=order.pk, menu_item_id=item_id, price=price, quantity=quantity)
+                    for order, lines in zip(orders, order_lines)
+                    for item_id, price, quantity in lines
+                ]
+                OrderItem.objects.bulk_create(items, batch_size=options['batch_size'])
+
+            remaining -= batch_size
+            total_orders += len(orders)
+            total_items += len(items)
+            self.stdout.write(f"{total_orders} orders, {total_items} order items")
+        return total_orders, total_items
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menu", "0002_menuitem_access_indexes"),
+        ("accounts", "0001_initial"),
+        ("orders", "0003_order_access_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RestaurantDailySales",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("order_count", models.PositiveIntegerField(default=0)),
+                ("revenue", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("day", models.DateField()),
+                ("restaurant", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="daily_sales", to="accounts.restaurant")),
+            ],
+            options={
+                "verbose_name_plural": "Restaurant daily sales",
+                "ordering": ["-day"],
+                "unique_together": {("restaurant", "day")},
+            },
+        ),
+        migrations.CreateModel(
+            name="MenuItemDailySales",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("order_count", models.PositiveIntegerField(default=0)),
+                ("revenue", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("day", models.DateField()),
+                ("quantity", models.PositiveIntegerField(default=0)),
+                ("menu_item", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="daily_sales", to="menu.menuitem")),
+                ("restaurant", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="menu_item_daily_sales", to="accounts.restaurant")),
+            ],
+            options={
+                "verbose_name_plural": "Menu item daily sales",
+                "ordering": ["-day"],
+                "unique_together": {("restaurant", "day", "menu_item")},
+            },
+        ),
+    ]
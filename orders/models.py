@@ -1,6 +1,11 @@
-from django.db import models
-from accounts.models import Customer, Restaurant
+from collections import defaultdict
+from decimal import Decimal
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from accounts.models import Customer, Restaurant, User
 from menu.models import MenuItem
+from .events import get_broker, order_event
 
 class Order(models.Model):
     """Model representing a customer's order."""
@@ -37,18 +42,81 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of restaurant feeds and customer history
+            models.Index(fields=['restaurant', '-created_at', '-id'], name='order_restaurant_feed_idx'),
+            models.Index(fields=['customer', '-created_at', '-id'], name='order_customer_feed_idx'),
+            # Kitchen boards filter by restaurant and status, newest first
+            models.Index(fields=['restaurant', 'status', '-created_at'], name='order_restaurant_status_idx'),
+        ]
         
     def __str__(self):
         return f"Order #{self.id} - {self.customer.user.email}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the persisted status to detect transitions on save
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
+    
     def save(self, *args, **kwargs):
-        # Calculate total amount from order items
-        if not self.id:  # Only for new orders
-            super().save(*args, **kwargs)  # Save once to get ID
+        # The total is maintained by OrderItem deltas, so updates of an existing
+        # order must not write back a possibly stale in-memory total_amount.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'total_amount'
+            ]
+        
+        adding = self._state.adding
+        previous_status = getattr(self, '_loaded_status', None)
+        status_changed = not adding and previous_status not in (None, self.status)
+        
+        if status_changed and self.status == 'delivered':
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                self.record_sales()
         else:
-            # Calculate total from items
-            self.total_amount = sum(item.subtotal for item in self.items.all())
             super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        
+        # Notify live order boards once the change is visible to readers
+        if adding:
+            self.publish_event_on_commit('order.created')
+        elif status_changed:
+            self.publish_event_on_commit('order.status_changed', previous_status)
+    
+    def publish_event_on_commit(self, event_type, previous_status=None):
+        """Publish an order event to live subscribers after the transaction commits."""
+        event = order_event(event_type, self, previous_status)
+        restaurant_id = self.restaurant_id
+        transaction.on_commit(lambda: get_broker().publish(restaurant_id, event))
+    
+    def record_sales(self):
+        """Add this delivered order to the daily sales rollups."""
+        record_delivered_sales([self])
+    
+    def apply_total_delta(self, delta):
+        """Adjust the stored total by ``delta`` with a single DB-side UPDATE."""
+        if not delta:
+            return
+        Order.objects.filter(pk=self.pk).update(
+            total_amount=F('total_amount') + delta,
+            updated_at=timezone.now()
+        )
+        self.total_amount = Decimal(str(self.total_amount)) + delta
+    
+    def recalculate_total(self):
+        """Recompute the total from the order items with a single aggregate."""
+        self.total_amount = self.items.aggregate(
+            total=Sum(F('price') * F('quantity'))
+        )['total'] or 0
+        Order.objects.filter(pk=self.pk).update(
+            total_amount=self.total_amount,
+            updated_at=timezone.now()
+        )
 
 class OrderItem(models.Model):
     """Model representing an individual item in an order."""
@@ -77,13 +145,175 @@ class OrderItem(models.Model):
         """Calculate the subtotal for this item."""
         return self.price * self.quantity
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the persisted subtotal so saves can apply a delta
+        if 'price' in field_names and 'quantity' in field_names:
+            instance._loaded_subtotal = instance.subtotal
+        return instance
+    
     def save(self, *args, **kwargs):
         # Set price from menu item if not explicitly set
         if not self.price:
             self.price = self.menu_item.price
         
+        previous_subtotal = 0 if self._state.adding else getattr(self, '_loaded_subtotal', None)
+        
         # Save the item
         super().save(*args, **kwargs)
         
         # Update order total
-        self.order.save()
+        if previous_subtotal is None:
+            self.order.recalculate_total()
+        else:
+            self.order.apply_total_delta(self.subtotal - previous_subtotal)
+        self._loaded_subtotal = self.subtotal
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        
+        # Remove the persisted subtotal from the order total
+        previous_subtotal = getattr(self, '_loaded_subtotal', None)
+        if previous_subtotal is None:
+            self.order.recalculate_total()
+        else:
+            self.order.apply_total_delta(-previous_subtotal)
+        return result
+
+def record_delivered_sales(orders):
+    """
+    Add newly delivered ``orders`` to the daily sales rollups.
+    
+    The orders need their restaurant, total and creation date; the items of
+    all of them are aggregated in one query.
+    """
+    orders = {order.pk: order for order in orders}
+    if not orders:
+        return
+    restaurant_totals = defaultdict(lambda: [0, Decimal('0')])
+    days = {}
+    for order in orders.values():
+        days[order.pk] = day = timezone.localdate(order.created_at)
+        totals = restaurant_totals[order.restaurant_id, day]
+        totals[0] += 1
+        totals[1] += Decimal(str(order.total_amount))
+    for (restaurant_id, day), (order_count, revenue) in restaurant_totals.items():
+        RestaurantDailySales.add(restaurant_id, day, order_count=order_count, revenue=revenue)
+    
+    item_totals = defaultdict(lambda: [0, 0, Decimal('0')])
+    rows = OrderItem.objects.filter(order_id__in=list(orders)).values('order_id', 'menu_item_id').annotate(
+        total_quantity=Sum('quantity'),
+        total_revenue=Sum(F('price') * F('quantity'))
+    ).order_by()
+    for row in rows:
+        order = orders[row['order_id']]
+        totals = item_totals[order.restaurant_id, row['menu_item_id'], days[order.pk]]
+        totals[0] += 1
+        totals[1] += row['total_quantity']
+        totals[2] += row['total_revenue']
+    for (restaurant_id, menu_item_id, day), (order_count, quantity, revenue) in item_totals.items():
+        MenuItemDailySales.add(
+            restaurant_id, menu_item_id, day, order_count=order_count, quantity=quantity, revenue=revenue
+        )
+
+class SalesRollup(models.Model):
+    """Base class for pre-aggregated sales counters updated in place."""
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        abstract = True
+    
+    @classmethod
+    def _increment(cls, key, **amounts):
+        """Add ``amounts`` to the row identified by ``key``, creating it if needed."""
+        increments = {name: F(name) + value for name, value in amounts.items()}
+        if cls.objects.filter(**key).update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(**key, **amounts)
+        except IntegrityError:
+            # Another transaction created the row first
+            cls.objects.filter(**key).update(**increments)
+
+class RestaurantDailySales(SalesRollup):
+    """Orders delivered and revenue per restaurant and day."""
+    restaurant = models.ForeignKey(
+        Restaurant, 
+        on_delete=models.CASCADE, 
+        related_name='daily_sales'
+    )
+    day = models.DateField()
+    
+    class Meta:
+        unique_together = ('restaurant', 'day')
+        ordering = ['-day']
+        verbose_name_plural = 'Restaurant daily sales'
+    
+    def __str__(self):
+        return f"{self.restaurant_id} on {self.day}: {self.revenue}"
+    
+    @classmethod
+    def add(cls, restaurant_id, day, order_count, revenue):
+        cls._increment({'restaurant_id': restaurant_id, 'day': day}, order_count=order_count, revenue=revenue)
+
+class MenuItemDailySales(SalesRollup):
+    """Quantity sold and revenue per menu item and day."""
+    restaurant = models.ForeignKey(
+        Restaurant, 
+        on_delete=models.CASCADE, 
+        related_name='menu_item_daily_sales'
+    )
+    menu_item = models.ForeignKey(
+        MenuItem, 
+        on_delete=models.CASCADE, 
+        related_name='daily_sales'
+    )
+    day = models.DateField()
+    quantity = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('restaurant', 'day', 'menu_item')
+        ordering = ['-day']
+        verbose_name_plural = 'Menu item daily sales'
+    
+    def __str__(self):
+        return f"{self.menu_item_id} on {self.day}: {self.quantity}"
+    
+    @classmethod
+    def add(cls, restaurant_id, menu_item_id, day, order_count, quantity, revenue):
+        cls._increment(
+            {'restaurant_id': restaurant_id, 'menu_item_id': menu_item_id, 'day': day},
+            order_count=order_count, quantity=quantity, revenue=revenue
+        )
+
+class IdempotencyKey(models.Model):
+    """First response to a request sent with an ``Idempotency-Key`` header, replayed for retries."""
+    user = models.ForeignKey(
+        User, 
+        on_delete=models.CASCADE, 
+        related_name='idempotency_keys'
+    )
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    # Both are empty while the first request is still being processed
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        # Concurrent duplicates race on this constraint; only one inserts
+        unique_together = ('user', 'key')
+        indexes = [
+            # Expired keys are purged by age
+            models.Index(fields=['created_at'], name='idempotency_key_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.key}"
+    
+    @property
+    def is_complete(self):
+        return self.response_status is not None
@@ -0,0 +1,212 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def get_query_params(request):
+    """Return the query parameters of a DRF or plain Django request."""
+    return getattr(request, 'query_params', request.GET)
+
+
+class OrderLimitOffsetPagination(LimitOffsetPagination):
+    """Offset paging kept for clients that still send ``limit``/``offset``."""
+    default_limit = 50
+    max_limit = 500
+
+
+class OrderCursorPagination(BasePagination):
+    """
+    Keyset pagination over ``(created_at, id)``, newest orders first.
+
+    Each page is fetched with ``WHERE (created_at, id) < cursor`` on the
+    composite index, so deep pages cost the same as the first one.
+    ``?ordering=`` may name one of ``ordering_fields``, optionally prefixed
+    with ``-``; any other ordering is rejected, since the cursor could not
+    follow it. Requests that pass ``limit`` or ``offset`` keep the classic
+    LimitOffsetPagination behaviour for backward compatibility.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    offset_pagination_class = OrderLimitOffsetPagination
+    # Datetime fields the cursor can follow
+    ordering_fields = ('created_at', 'updated_at')
+    default_ordering = '-created_at'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Fall back to offset paging when the client asks for it
+        if 'limit' in request.query_params or 'offset' in request.query_params:
+            self.offset_paginator = self.offset_pagination_class()
+            return self.offset_paginator.paginate_queryset(queryset, request, view)
+
+        return self.set_page(list(self.get_page_queryset(queryset, request, view)))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the sliced queryset of the requested cursor page.
+
+        The caller evaluates it (sync or async) and hands the rows to
+        ``set_page``; offset paging is not handled here.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.offset_paginator = None
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view)
+        self.cursor = self.decode_cursor(request)
+
+        field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+        if self.cursor is None:
+            ascending = not descending
+        else:
+            reverse, value, pk = self.cursor
+            # Walking back towards the previous page reverses the direction
+            ascending = descending if reverse else not descending
+            lookup = 'gt' if ascending else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk}),
+                **{f'{field}__{lookup}e': value}
+            )
+        queryset = queryset.order_by(field, 'id') if ascending else queryset.order_by(f'-{field}', '-id')
+
+        # Fetch one extra row to know whether another page follows
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        """Record the rows fetched by ``get_page_queryset`` and return the page."""
+        reverse = self.cursor is not None and self.cursor[0]
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_ordering(self, request, view=None):
+        """Return the requested ordering, e.g. ``-created_at``; reject the ones the cursor cannot follow."""
+        ordering = get_query_params(request).get(api_settings.ORDERING_PARAM)
+        if not ordering:
+            return self.default_ordering
+        fields = [
+            field for field in getattr(view, 'ordering_fields', None) or self.ordering_fields
+            if field in self.ordering_fields
+        ]
+        if ordering.lstrip('-') not in fields or ordering.count('-') > 1:
+            choices = ', '.join(f'{field}, -{field}' for field in fields)
+            raise ValidationError({
+                api_settings.ORDERING_PARAM: [f"Orders can only be ordered by one of: {choices}."]
+            })
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(get_query_params(request)[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(False, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Nothing left on this side; go back to the first page
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(True, self.page[0])
+
+    def decode_cursor(self, request):
+        """Return ``(reverse, ordering field value, id)`` from the request, or None."""
+        encoded = get_query_params(request).get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens['r'][0]))
+            value = parse_datetime(tokens['t'][0])
+            pk = int(tokens['i'][0])
+            ordering = tokens.get('o', [self.default_ordering])[0]
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound(self.invalid_cursor_message)
+        # A cursor only makes sense for the ordering it was created with
+        if value is None or ordering != self.ordering:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, value, pk
+
+    def encode_cursor(self, reverse, order):
+        field = self.ordering.lstrip('-')
+        # Pages hold orders, or dicts when the queryset was projected with values()
+        if isinstance(order, dict):
+            value, pk = order[field], order['id']
+        else:
+            value, pk = getattr(order, field), order.pk
+        querystring = parse.urlencode({
+            'r': int(reverse),
+            't': value.isoformat(),
+            'i': pk,
+            'o': self.ordering,
+        })
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from accounts.authentication import get_customer_pk, get_restaurant_pk
 
 class IsCustomerOrRestaurantOwner(permissions.BasePermission):
     """
@@ -14,11 +15,13 @@ class IsCustomerOrRestaurantOwner(permissions.BasePermission):
             return True
         
         # Check if user is the customer who placed the order
-        if hasattr(request.user, 'customer_profile') and obj.customer == request.user.customer_profile:
+        customer_pk = get_customer_pk(request.user)
+        if customer_pk is not None and obj.customer_id == customer_pk:
             return True
         
         # Check if user is the restaurant owner who received the order
-        if hasattr(request.user, 'restaurant_profile') and obj.restaurant == request.user.restaurant_profile:
+        restaurant_pk = get_restaurant_pk(request.user)
+        if restaurant_pk is not None and obj.restaurant_id == restaurant_pk:
             return True
         
         return False
@@ -34,7 +37,16 @@ class IsRestaurantOwner(permissions.BasePermission):
             return True
         
         # Check if user is the restaurant owner who received the order
-        if hasattr(request.user, 'restaurant_profile') and obj.restaurant == request.user.restaurant_profile:
+        restaurant_pk = get_restaurant_pk(request.user)
+        if restaurant_pk is not None and obj.restaurant_id == restaurant_pk:
             return True
         
         return False
+
+class IsRestaurant(permissions.BasePermission):
+    """
+    Permission to allow only users with a restaurant profile.
+    """
+    
+    def has_permission(self, request, view):
+        return get_restaurant_pk(request.user) is not None
@@ -1,6 +1,10 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Order, OrderItem
+from .models import Order, OrderItem, RestaurantDailySales
+from .transitions import allowed_transitions, can_transition, transition_order
 from menu.models import MenuItem
+from menu.state import get_menu_state
+from accounts.authentication import get_customer_pk
 from accounts.serializers import CustomerProfileSerializer
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -14,7 +18,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
     def validate_menu_item(self, value):
         # Check if the menu item belongs to the restaurant associated with the order
         order = self.context['order']
-        if value.restaurant != order.restaurant:
+        if value.restaurant_id != order.restaurant_id:
             raise serializers.ValidationError("This menu item does not belong to the restaurant.")
         
         # Check if the menu item is available
@@ -23,17 +27,29 @@ class OrderItemSerializer(serializers.ModelSerializer):
         
         return value
 
+class MenuItemPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Menu item reference that only checks the type of the primary key.
+
+    The menu items of an order are validated together, against the cached
+    menu state, by ``OrderCreateSerializer.validate_order_items``.
+    """
+    
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
 class OrderItemCreateSerializer(serializers.ModelSerializer):
+    menu_item = MenuItemPrimaryKeyField(queryset=MenuItem.objects.all())
+    
     class Meta:
         model = OrderItem
         fields = ('menu_item', 'quantity', 'special_instructions')
 
-    def validate_menu_item(self, value):
-        # Check if the menu item is available
-        if not value.is_available:
-            raise serializers.ValidationError("This menu item is currently unavailable.")
-        return value
-
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     customer_details = CustomerProfileSerializer(source='customer', read_only=True)
@@ -45,7 +61,8 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ('id', 'customer', 'customer_details', 'restaurant', 'restaurant_name', 
                   'status', 'status_display', 'delivery_address', 'special_instructions',
                   'total_amount', 'items', 'created_at', 'updated_at')
-        read_only_fields = ('customer', 'total_amount', 'created_at', 'updated_at')
+        # Status changes go through update_status and bulk-status (the state machine)
+        read_only_fields = ('customer', 'status', 'total_amount', 'created_at', 'updated_at')
 
 class OrderCreateSerializer(serializers.ModelSerializer):
     items = OrderItemCreateSerializer(many=True)
@@ -54,36 +71,80 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         model = Order
         fields = ('restaurant', 'delivery_address', 'special_instructions', 'items')
     
-    def validate_restaurant(self, value):
-        # Check if the restaurant exists and is active
-        if not hasattr(value.user, 'restaurant_profile'):
-            raise serializers.ValidationError("Invalid restaurant.")
-        return value
+    def validate(self, data):
+        # Only customers can place orders
+        if get_customer_pk(self.context['request'].user) is None:
+            raise serializers.ValidationError("Only customers can place orders.")
+        data['items'] = self.validate_order_items(data['restaurant'], data['items'])
+        return data
+    
+    def validate_order_items(self, restaurant, items):
+        """
+        Check and price every order line against the cached menu state.
+        
+        A warm menu costs no query; errors are reported per line, like the
+        errors of a nested list serializer.
+        """
+        menu = get_menu_state(restaurant.pk)
+        requested = {item['menu_item'] for item in items}
+        if not requested <= menu.keys():
+            # Possibly created since the menu was cached, before its version bump
+            menu = get_menu_state(restaurant.pk, refresh=True)
+        unknown = requested - menu.keys()
+        existing = set()
+        if unknown:
+            # Only on the error path: tell items of other restaurants from missing ones
+            existing = set(MenuItem.objects.filter(pk__in=unknown).values_list('pk', flat=True))
+        does_not_exist = self.fields['items'].child.fields['menu_item'].error_messages['does_not_exist']
+        
+        errors = []
+        for item in items:
+            state = menu.get(item['menu_item'])
+            if state is None:
+                if item['menu_item'] in existing:
+                    error = "This menu item does not belong to the restaurant."
+                else:
+                    error = does_not_exist.format(pk_value=item['menu_item'])
+            elif not state.is_available:
+                error = "This menu item is currently unavailable."
+            else:
+                item['price'] = state.price
+                errors.append({})
+                continue
+            errors.append({'menu_item': [error]})
+        
+        if any(errors):
+            raise serializers.ValidationError({'items': errors})
+        return items
     
     def create(self, validated_data):
         # Extract items data
         items_data = validated_data.pop('items')
         
         # Set the customer to the current user's customer profile
-        user = self.context['request'].user
-        validated_data['customer'] = user.customer_profile
+        validated_data['customer_id'] = get_customer_pk(self.context['request'].user)
         
-        # Create the order
-        order = Order.objects.create(**validated_data)
-        
-        # Create order items
-        for item_data in items_data:
-            menu_item = item_data['menu_item']
-            OrderItem.objects.create(
-                order=order,
-                menu_item=menu_item,
+        # Build the order items up front so the total is computed once
+        order_items = [
+            OrderItem(
+                menu_item_id=item_data['menu_item'],
                 quantity=item_data['quantity'],
-                price=menu_item.price,
+                price=item_data['price'],
                 special_instructions=item_data.get('special_instructions', '')
             )
+            for item_data in items_data
+        ]
+        validated_data['total_amount'] = sum(item.subtotal for item in order_items)
         
-        # Calculate the total (will be done in the OrderItem's save method)
-        order.save()
+        with transaction.atomic():
+            # Create the order with its final total
+            order = Order.objects.create(**validated_data)
+            
+            # Insert all items in a single statement (bypasses OrderItem.save,
+            # so the order total is not recalculated once per line)
+            for order_item in order_items:
+                order_item.order = order
+            OrderItem.objects.bulk_create(order_items)
         
         return order
 
@@ -93,24 +154,36 @@ class OrderStatusUpdateSerializer(serializers.ModelSerializer):
         fields = ('status',)
     
     def validate_status(self, value):
-        # Get the current status
         current_status = self.instance.status
-        
-        # Define valid status transitions
-        valid_transitions = {
-            'pending': ['accepted', 'cancelled'],
-            'accepted': ['preparing', 'cancelled'],
-            'preparing': ['ready', 'cancelled'],
-            'ready': ['out_for_delivery', 'delivered', 'cancelled'],
-            'out_for_delivery': ['delivered', 'cancelled'],
-            'delivered': [],  # Terminal state
-            'cancelled': [],  # Terminal state
-        }
-        
-        if value not in valid_transitions.get(current_status, []):
-            valid_options = ', '.join(valid_transitions.get(current_status, []))
+        if not can_transition(current_status, value):
+            valid_options = ', '.join(allowed_transitions(current_status))
             raise serializers.ValidationError(
                 f"Invalid status transition. From '{current_status}', valid options are: {valid_options}"
             )
         
         return value
+    
+    def update(self, instance, validated_data):
+        # Conditional UPDATE of the status only; raises TransitionConflict
+        return transition_order(instance, validated_data['status'])
+
+class OrderBulkStatusUpdateSerializer(serializers.Serializer):
+    """Move several orders of the restaurant to the same status."""
+    orders = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=100)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
+class SalesRangeSerializer(serializers.Serializer):
+    """Query parameters of the sales analytics endpoints."""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=10)
+    
+    def validate(self, data):
+        if data.get('start') and data.get('end') and data['start'] > data['end']:
+            raise serializers.ValidationError("start must not be after end.")
+        return data
+
+class RestaurantDailySalesSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RestaurantDailySales
+        fields = ('day', 'order_count', 'revenue')
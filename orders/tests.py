@@ -0,0 +1,499 @@
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import Customer, Restaurant, User
+from accounts.testing import api_client, auth_headers, create_customer, create_restaurant
+from menu.models import MenuItem
+from restaurant_order_system.checks import check_replica_pin_cache
+from .fast_serializers import FastOrderSerializer
+from .idempotency import claim_key, reclaim_key, request_fingerprint
+from .models import IdempotencyKey, MenuItemDailySales, Order, OrderItem, RestaurantDailySales
+from .serializers import OrderSerializer
+from .transitions import TRANSITION_FIELDS, TransitionConflict, transition_orders
+from .views import OrderViewSet
+
+
+class OrderFixtureMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_fixtures()
+
+    @classmethod
+    def create_fixtures(cls):
+        cls.restaurant = create_restaurant()
+        cls.customer = create_customer()
+        cls.menu_items = [
+            MenuItem.objects.create(restaurant=cls.restaurant, name=f'Dish {n}', price=Decimal('4.50') + n)
+            for n in range(4)
+        ]
+
+    def create_orders(self, count, items_per_order=3):
+        orders = []
+        for _ in range(count):
+            order = Order.objects.create(customer=self.customer, restaurant=self.restaurant)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, menu_item=menu_item, quantity=2, price=menu_item.price)
+                for menu_item in self.menu_items[:items_per_order]
+            ])
+            orders.append(order)
+        return orders
+
+
+class OrderQueryCountTests(OrderFixtureMixin, TestCase):
+    """The order list and detail run a fixed number of queries, whatever the number of orders and items."""
+
+    def test_order_list_queries_do_not_grow_with_orders(self):
+        for user in (self.restaurant.user, self.customer.user):
+            with self.subTest(user=user.email):
+                Order.objects.all().delete()
+                client = api_client(user)
+                self.create_orders(2)
+                # The page of orders and one query for all of their items
+                with self.assertNumQueries(2):
+                    response = client.get('/api/orders/')
+                self.assertEqual(len(response.data['results']), 2)
+
+                self.create_orders(18, items_per_order=4)
+                with self.assertNumQueries(2):
+                    response = client.get('/api/orders/')
+                self.assertEqual(len(response.data['results']), 20)
+                self.assertEqual(sum(len(order['items']) for order in response.data['results']), 78)
+
+    def test_order_detail_queries_do_not_grow_with_items(self):
+        small, large = self.create_orders(1, items_per_order=1) + self.create_orders(1, items_per_order=4)
+        client = api_client(self.customer.user)
+        # The order with its customer, user and restaurant joined, then its items
+        with self.assertNumQueries(2):
+            response = client.get(f'/api/orders/{small.pk}/')
+        self.assertEqual(len(response.data['items']), 1)
+        with self.assertNumQueries(2):
+            response = client.get(f'/api/orders/{large.pk}/')
+        self.assertEqual(len(response.data['items']), 4)
+
+
+class AsyncOrderViewTests(OrderFixtureMixin, TestCase):
+    """The async order endpoints return what the sync ones do."""
+
+    async def test_list_and_detail_match_the_sync_endpoints(self):
+        orders = await sync_to_async(self.create_orders)(3)
+        client = api_client(self.customer.user)
+        headers = auth_headers(self.customer.user)
+        async_client = AsyncClient()
+        for sync_url, async_url in (
+            ('/api/orders/', '/api/orders/async/'),
+            (f'/api/orders/{orders[0].pk}/', f'/api/orders/async/{orders[0].pk}/'),
+        ):
+            with self.subTest(url=async_url):
+                response = await async_client.get(async_url, headers=headers)
+                self.assertEqual(response.status_code, 200)
+                expected = await sync_to_async(client.get)(sync_url)
+                self.assertEqual(response.json(), json.loads(expected.content))
+
+
+class OrderCursorPaginationTests(OrderFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.orders = self.create_orders(5, items_per_order=1)
+        # updated_at in the reverse order of creation
+        for n, order in enumerate(reversed(self.orders)):
+            Order.objects.filter(pk=order.pk).update(updated_at=order.created_at + timedelta(minutes=n))
+        self.client = api_client(self.customer.user)
+
+    def walk(self, url):
+        ids, pages = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            ids += [order['id'] for order in response.data['results']]
+            pages.append(response.data)
+            url = response.data['next']
+        return ids, pages
+
+    def test_pages_follow_the_requested_ordering(self):
+        pks = [order.pk for order in self.orders]
+        expected = {
+            '': pks[::-1],
+            'created_at': pks,
+            '-updated_at': pks,
+            'updated_at': pks[::-1],
+        }
+        for ordering, expected_ids in expected.items():
+            with self.subTest(ordering=ordering):
+                ids, pages = self.walk(f'/api/orders/?page_size=2&ordering={ordering}')
+                self.assertEqual(ids, expected_ids)
+                # Walking back from the last page returns the previous one
+                previous = self.client.get(pages[-1]['previous']).data
+                self.assertEqual(previous['results'], pages[-2]['results'])
+
+    def test_unsupported_ordering_is_rejected(self):
+        for ordering in ('total_amount', 'created_at,id', '--created_at'):
+            with self.subTest(ordering=ordering):
+                response = self.client.get(f'/api/orders/?ordering={ordering}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('ordering', response.data)
+
+    def test_cursor_of_another_ordering_is_rejected(self):
+        next_url = self.client.get('/api/orders/?page_size=2&ordering=updated_at').data['next']
+        response = self.client.get(next_url.replace('ordering=updated_at', 'ordering=-created_at'))
+        self.assertEqual(response.status_code, 404)
+
+
+class SalesRollupTests(OrderFixtureMixin, TestCase):
+    def assert_rollups(self, order_count, quantity):
+        restaurant_sales = RestaurantDailySales.objects.get(restaurant=self.restaurant)
+        self.assertEqual(restaurant_sales.order_count, order_count)
+        self.assertEqual(restaurant_sales.revenue, sum(
+            order.total_amount for order in Order.objects.filter(status='delivered')
+        ))
+        item_sales = MenuItemDailySales.objects.get(menu_item=self.menu_items[0])
+        self.assertEqual((item_sales.order_count, item_sales.quantity), (order_count, quantity))
+
+    def test_bulk_status_delivery_is_recorded(self):
+        orders = self.create_orders(3, items_per_order=2)
+        Order.objects.update(status='ready')
+        client = api_client(self.restaurant.user)
+        response = client.post('/api/orders/bulk-status/', {
+            'orders': [order.pk for order in orders], 'status': 'delivered'
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data['updated']), 3)
+        self.assert_rollups(order_count=3, quantity=6)
+
+    def test_transition_records_newly_delivered_orders_only(self):
+        first, second = self.create_orders(2)
+        transition_orders(list(Order.objects.filter(pk=first.pk).only(*TRANSITION_FIELDS)), 'delivered')
+        self.assert_rollups(order_count=1, quantity=2)
+        # The order already delivered is not counted twice
+        transition_orders(list(Order.objects.only(*TRANSITION_FIELDS)), 'delivered')
+        self.assert_rollups(order_count=2, quantity=4)
+
+    def test_queryset_update_does_not_record_sales(self):
+        self.create_orders(2)
+        Order.objects.update(status='delivered')
+        self.assertFalse(RestaurantDailySales.objects.exists())
+        self.assertFalse(MenuItemDailySales.objects.exists())
+
+
+class OrderTotalTests(OrderFixtureMixin, TestCase):
+    """Order totals follow the changes of their items."""
+
+    def setUp(self):
+        self.order = Order.objects.create(customer=self.customer, restaurant=self.restaurant)
+        for menu_item in self.menu_items[:2]:
+            OrderItem.objects.create(order=self.order, menu_item=menu_item, quantity=2)
+
+    def assert_total(self, expected):
+        self.assertEqual(Order.objects.get(pk=self.order.pk).total_amount, Decimal(expected))
+        # The stored total always matches the items
+        self.assertEqual(sum(item.subtotal for item in OrderItem.objects.filter(order=self.order)), Decimal(expected))
+
+    def test_created_orders_are_totalled(self):
+        # 2 x 4.50 + 2 x 5.50
+        self.assert_total('20.00')
+
+    def test_added_item_adds_its_subtotal(self):
+        OrderItem.objects.create(order=self.order, menu_item=self.menu_items[3], quantity=1)
+        self.assert_total('27.50')
+
+    def test_quantity_change_applies_the_difference(self):
+        item = OrderItem.objects.filter(order=self.order).first()
+        item.quantity = 5
+        item.save()
+        self.assert_total('33.50')
+        # A second save applies only the new difference
+        item.quantity = 1
+        item.save()
+        self.assert_total('15.50')
+
+    def test_deleted_item_removes_its_subtotal(self):
+        OrderItem.objects.filter(order=self.order).first().delete()
+        self.assert_total('11.00')
+
+    def test_item_saved_without_its_loaded_subtotal_recalculates(self):
+        item = OrderItem.objects.only('id', 'order_id', 'quantity').filter(order=self.order).first()
+        item.quantity = 3
+        item.save()
+        self.assert_total('24.50')
+
+    def test_order_save_keeps_the_stored_total(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        OrderItem.objects.create(order=self.order, menu_item=self.menu_items[3], quantity=1)
+        stale.delivery_address = 'Dock 4'
+        stale.save()
+        self.assert_total('27.50')
+        # Even when total_amount is named explicitly
+        stale.save(update_fields=['total_amount', 'delivery_address'])
+        self.assertEqual(Order.objects.get(pk=self.order.pk).delivery_address, 'Dock 4')
+
+    def test_status_save_is_a_single_update(self):
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = 'accepted'
+        with self.assertNumQueries(1):
+            order.save()
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'accepted')
+        self.assert_total('20.00')
+
+
+class FastOrderSerializerTests(OrderFixtureMixin, TestCase):
+    """FastOrderSerializer renders exactly what OrderSerializer renders."""
+
+    def render_both(self, context):
+        queryset = OrderViewSet.optimize_for_serializer(Order.objects.order_by('-created_at', '-id'))
+        expected = OrderSerializer(queryset, many=True, context=context).data
+        fast = FastOrderSerializer(FastOrderSerializer.project(queryset), context=context).data
+        return JSONRenderer().render(fast), JSONRenderer().render(expected)
+
+    def test_same_output(self):
+        first, second = self.create_orders(2, items_per_order=3)
+        self.create_orders(1, items_per_order=0)
+        Order.objects.filter(pk=first.pk).update(status='out_for_delivery', special_instructions='Ring twice')
+        OrderItem.objects.filter(order=second).update(price=Decimal('3.1'), quantity=3)
+        request = Request(APIRequestFactory().get('/api/orders/'))
+        for context in ({'request': request}, {}):
+            with self.subTest(request='request' in context):
+                fast, expected = self.render_both(context)
+                self.assertEqual(fast, expected)
+        self.assertIn(b'"status_display":"Out for Delivery"', fast)
+        self.assertIn(b'"price":"3.10"', fast)
+        self.assertIn(b'"items":[]', fast)
+
+    def test_same_datetimes_in_another_timezone(self):
+        self.create_orders(2)
+        with timezone.override('America/New_York'):
+            fast, expected = self.render_both({})
+        self.assertEqual(fast, expected)
+        self.assertRegex(fast, rb'"created_at":"[^"]+-0[45]:00"')
+
+
+class IdempotencyKeyTests(OrderFixtureMixin, TestCase):
+    def setUp(self):
+        self.client = api_client(self.customer.user)
+        self.body = {
+            'restaurant': self.restaurant.pk,
+            'delivery_address': 'Dock 4',
+            'items': [{'menu_item': self.menu_items[0].pk, 'quantity': 2}],
+        }
+
+    def post(self, key, body=None, client=None):
+        return (client or self.client).post('/api/orders/', body or self.body, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def create_key(self, key, age=timedelta(0), **fields):
+        fields.setdefault('request_hash', request_fingerprint(self.body))
+        record = IdempotencyKey.objects.create(user=self.customer.user, key=key, **fields)
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=timezone.now() - age)
+        return IdempotencyKey.objects.get(pk=record.pk)
+
+    def test_retry_replays_the_first_response(self):
+        first = self.post('retry')
+        self.assertEqual(first.status_code, 201, first.data)
+        replay = self.post('retry')
+        self.assertEqual((replay.status_code, replay['Idempotent-Replayed']), (201, 'true'))
+        self.assertEqual(replay.data, json.loads(first.content))
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self.post('reused')
+        response = self.post('reused', {**self.body, 'delivery_address': 'Dock 5'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_being_processed_is_a_conflict(self):
+        self.create_key('in-progress')
+        self.assertEqual(self.post('in-progress').status_code, 409)
+        self.assertFalse(Order.objects.exists())
+
+    def test_racing_claims_let_one_request_through(self):
+        request_hash = request_fingerprint(self.body)
+        record, response = claim_key(self.customer.user.pk, 'race', request_hash)
+        self.assertIsNotNone(record)
+        # The duplicate loses the insert and finds the key still in progress
+        record, response = claim_key(self.customer.user.pk, 'race', request_hash)
+        self.assertIsNone(record)
+        self.assertEqual(response.status_code, 409)
+
+    def test_racing_reclaims_let_one_request_through(self):
+        self.create_key('abandoned', age=timedelta(minutes=5))
+        # Both retries read the abandoned key before either takes it over
+        first, second = IdempotencyKey.objects.get(key='abandoned'), IdempotencyKey.objects.get(key='abandoned')
+        self.assertTrue(reclaim_key(first, 'first'))
+        self.assertFalse(reclaim_key(second, 'second'))
+        self.assertEqual(IdempotencyKey.objects.get(key='abandoned').request_hash, 'first')
+
+    @override_settings(IDEMPOTENCY_KEY_LOCK_TIMEOUT=60)
+    def test_abandoned_key_is_reclaimed(self):
+        self.create_key('abandoned', age=timedelta(seconds=61))
+        response = self.post('abandoned')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(IdempotencyKey.objects.get(key='abandoned').response_status, 201)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=3600)
+    def test_expired_key_is_reclaimed(self):
+        self.create_key('expired', age=timedelta(hours=2), request_hash='other', response_status=201, response_body={})
+        response = self.post('expired')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_keys_are_scoped_per_user(self):
+        other = api_client(create_customer('other@example.com').user)
+        self.assertEqual(self.post('shared').status_code, 201)
+        response = self.post('shared', client=other)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_failed_request_releases_the_key(self):
+        invalid = {**self.body, 'items': [{'menu_item': 0, 'quantity': 1}]}
+        self.assertEqual(self.post('failed', invalid).status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.post('failed').status_code, 201)
+
+
+class OrderTransitionTests(OrderFixtureMixin, TestCase):
+    def test_concurrent_change_to_another_selected_status_is_a_conflict(self):
+        accepted, preparing = self.create_orders(2)
+        Order.objects.filter(pk=accepted.pk).update(status='accepted')
+        Order.objects.filter(pk=preparing.pk).update(status='preparing')
+        orders = list(Order.objects.filter(pk__in=[accepted.pk, preparing.pk]).only(*TRANSITION_FIELDS))
+        # Another request moves the accepted order on after it was loaded
+        Order.objects.filter(pk=accepted.pk).update(status='preparing')
+        with self.assertRaises(TransitionConflict):
+            transition_orders(orders, 'cancelled')
+        self.assertEqual(
+            dict(Order.objects.values_list('pk', 'status')),
+            {accepted.pk: 'preparing', preparing.pk: 'preparing'}
+        )
+
+    def test_orders_in_several_statuses_are_moved_together(self):
+        orders = self.create_orders(3)
+        Order.objects.filter(pk=orders[0].pk).update(status='accepted')
+        transition_orders(list(Order.objects.only(*TRANSITION_FIELDS)), 'cancelled')
+        self.assertEqual(set(Order.objects.values_list('status', flat=True)), {'cancelled'})
+
+    def test_order_update_cannot_change_the_status(self):
+        order, = self.create_orders(1)
+        client = api_client(self.restaurant.user)
+        response = client.patch(f'/api/orders/{order.pk}/', {'status': 'delivered', 'delivery_address': 'Dock 4'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.delivery_address), ('pending', 'Dock 4'))
+        self.assertFalse(RestaurantDailySales.objects.exists())
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(OrderFixtureMixin, TransactionTestCase):
+    """
+    Reads go to the replica, a second SQLite file holding a copy of the rows.
+
+    Reads inside a transaction stay on the primary, hence TransactionTestCase.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Registered after the test case set up its databases, so the replica
+        # is a plain file dropped with the class
+        cls.replica_dir = tempfile.TemporaryDirectory()
+        connections.settings['replica'] = {
+            **connections.settings['default'],
+            'NAME': os.path.join(cls.replica_dir.name, 'replica.sqlite3'),
+        }
+        call_command('migrate', database='replica', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.replica_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.create_fixtures()
+        self.create_orders(2, items_per_order=1)
+        models = (User, Restaurant, Customer, MenuItem, Order, OrderItem)
+        for model in reversed(models):
+            model.objects.using('replica').all().delete()
+        for model in models:
+            model.objects.using('replica').bulk_create(model.objects.all())
+        # Values only the replica has tell which database answered
+        Order.objects.using('replica').update(delivery_address='Replica Road')
+        MenuItem.objects.using('replica').update(description='Replica dish')
+        # Deleting the previous copy flagged its users inactive
+        cache.clear()
+
+    def test_order_export_reads_the_replica(self):
+        response = api_client(self.restaurant.user).get('/api/orders/export/')
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content.count('Replica Road'), 2)
+
+    def test_menu_export_reads_the_replica(self):
+        response = api_client(self.restaurant.user).get('/api/menu/items/export/')
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content.count('Replica dish'), 4)
+
+    def get_addresses(self, client):
+        response = client.get('/api/orders/')
+        self.assertEqual(response.status_code, 200)
+        return sorted(order['delivery_address'] for order in response.data['results'])
+
+    def test_write_pins_the_users_reads_to_the_primary_until_it_expires(self):
+        client = api_client(self.customer.user)
+        self.assertEqual(self.get_addresses(client), ['Replica Road'] * 2)
+        response = client.post('/api/orders/', {
+            'restaurant': self.restaurant.pk,
+            'delivery_address': 'Dock 4',
+            'items': [{'menu_item': self.menu_items[0].pk, 'quantity': 2}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        # The new order only exists on the primary
+        self.assertEqual(self.get_addresses(client), ['', '', 'Dock 4'])
+        # Other users keep reading from the replica
+        self.assertEqual(self.get_addresses(api_client(self.restaurant.user)), ['Replica Road'] * 2)
+
+        expired = time.time() + 11
+        with mock.patch('django.core.cache.backends.locmem.time', mock.Mock(time=lambda: expired)):
+            self.assertEqual(self.get_addresses(client), ['Replica Road'] * 2)
+
+    def test_failed_write_does_not_pin(self):
+        client = api_client(self.customer.user)
+        response = client.post('/api/orders/', {'restaurant': 0, 'items': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_addresses(client), ['Replica Road'] * 2)
+
+    async def test_async_view_reads_the_replica_and_write_pins(self):
+        client = AsyncClient()
+        headers = await sync_to_async(auth_headers)(self.customer.user)
+        response = await client.get('/api/orders/async/', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([order['delivery_address'] for order in response.json()['results']], ['Replica Road'] * 2)
+        response = await client.post('/api/orders/', {
+            'restaurant': self.restaurant.pk,
+            'delivery_address': 'Dock 4',
+            'items': [{'menu_item': self.menu_items[0].pk, 'quantity': 2}],
+        }, content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, 201)
+        response = await client.get('/api/orders/async/', headers=headers)
+        self.assertIn('Dock 4', [order['delivery_address'] for order in response.json()['results']])
+
+    def test_replicas_require_a_shared_cache(self):
+        self.assertEqual([error.id for error in check_replica_pin_cache(None)], ['restaurant_order_system.E001'])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            self.assertEqual(check_replica_pin_cache(None), [])
@@ -0,0 +1,83 @@
+"""
+Order status state machine.
+
+Transitions are applied with a conditional ``UPDATE ... WHERE id IN (...)
+AND status = ...`` per loaded status instead of a read-modify-write through
+``Order.save``: when another request moved an order on since it was read,
+fewer rows match and the whole transition is rolled back as a
+``TransitionConflict``. Order items are never loaded; orders moved to
+``delivered`` are added to the sales rollups in the same transaction, in one
+batch.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Order, record_delivered_sales
+
+ORDER_TRANSITIONS = {
+    'pending': ('accepted', 'cancelled'),
+    'accepted': ('preparing', 'cancelled'),
+    'preparing': ('ready', 'cancelled'),
+    'ready': ('out_for_delivery', 'delivered', 'cancelled'),
+    'out_for_delivery': ('delivered', 'cancelled'),
+    'delivered': (),  # Terminal state
+    'cancelled': (),  # Terminal state
+}
+
+# Fields the transitions read from an order
+TRANSITION_FIELDS = ('id', 'restaurant_id', 'status', 'total_amount', 'created_at')
+
+
+class TransitionConflict(Exception):
+    """An order is no longer in the status the transition was validated against."""
+
+
+def allowed_transitions(status):
+    return ORDER_TRANSITIONS.get(status, ())
+
+
+def can_transition(status, new_status):
+    return new_status in allowed_transitions(status)
+
+
+def transition_orders(orders, new_status):
+    """
+    Move ``orders``, loaded instances, to ``new_status``.
+
+    Every order must be allowed to make the transition from the status it
+    was loaded with; several orders should be loaded with ``select_for_update``
+    in the caller's transaction. Orders are updated with one UPDATE per
+    loaded status, each matching only the orders still in that status.
+    Raise ``TransitionConflict`` when any of them changed in the meantime,
+    leaving all of them untouched. Delivered orders are recorded in the
+    sales rollups, so they need the ``TRANSITION_FIELDS``.
+    """
+    orders = list(orders)
+    if not orders:
+        return orders
+    by_status = defaultdict(list)
+    for order in orders:
+        by_status[order.status].append(order.pk)
+    now = timezone.now()
+    with transaction.atomic():
+        for status, pks in by_status.items():
+            updated = Order.objects.filter(pk__in=pks, status=status).update(status=new_status, updated_at=now)
+            if updated != len(pks):
+                raise TransitionConflict(new_status)
+        if new_status == 'delivered':
+            record_delivered_sales([order for order in orders if order.status != 'delivered'])
+
+        for order in orders:
+            previous_status = order.status
+            order.status = order._loaded_status = new_status
+            order.updated_at = now
+            order.publish_event_on_commit('order.status_changed', previous_status)
+    return orders
+
+
+def transition_order(order, new_status):
+    """Move a single loaded order to ``new_status``; see ``transition_orders``."""
+    transition_orders([order], new_status)
+    return order
@@ -1,11 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register('', views.OrderViewSet)
 
 urlpatterns = [
+    path('events/', views.order_events, name='order-events'),
+    path('analytics/daily/', views.DailySalesView.as_view(), name='sales-daily'),
+    path('analytics/top-items/', views.TopMenuItemsView.as_view(), name='sales-top-items'),
+    path('async/', async_views.order_list, name='async-order-list'),
+    path('async/<int:pk>/', async_views.order_detail, name='async-order-detail'),
     path('', include(router.urls)),
     path('<int:order_pk>/items/', views.OrderItemViewSet.as_view({'get': 'list'}), name='order-items-list'),
     path('<int:order_pk>/items/<int:pk>/', views.OrderItemViewSet.as_view({'get': 'retrieve'}), name='order-item-detail'),
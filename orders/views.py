@@ -1,29 +1,54 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, generics, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.views import APIView
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch, Sum
+from django.http import JsonResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Order, OrderItem
+from accounts.authentication import (
+    get_customer_pk, get_restaurant_pk, get_token_user_id, get_validated_token, is_user_active
+)
+from .models import MenuItemDailySales, Order, OrderItem, RestaurantDailySales
 from .serializers import (
     OrderSerializer,
     OrderCreateSerializer,
     OrderStatusUpdateSerializer,
-    OrderItemSerializer
+    OrderBulkStatusUpdateSerializer,
+    OrderItemSerializer,
+    RestaurantDailySalesSerializer,
+    SalesRangeSerializer
 )
-from .permissions import IsCustomerOrRestaurantOwner, IsRestaurantOwner
+from .events import get_broker
+from .exports import CONTENT_TYPES, FORMATS, export_orders
+from .fast_serializers import FastOrderSerializer
+from .filters import OrderFilter
+from .idempotency import IdempotentCreateMixin
+from .pagination import OrderCursorPagination
+from .permissions import IsCustomerOrRestaurantOwner, IsRestaurant, IsRestaurantOwner
+from .transitions import TRANSITION_FIELDS, TransitionConflict, can_transition, transition_orders
+from restaurant_order_system.profiling import ProfiledViewMixin
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ProfiledViewMixin, IdempotentCreateMixin, viewsets.ModelViewSet):
     """API endpoint for orders."""
     queryset = Order.objects.all()
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['status']
+    filterset_class = OrderFilter
     ordering_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
+    pagination_class = OrderCursorPagination
     
     def get_serializer_class(self):
         if self.action == 'create':
             return OrderCreateSerializer
         elif self.action == 'update_status':
             return OrderStatusUpdateSerializer
+        elif self.action == 'bulk_status':
+            return OrderBulkStatusUpdateSerializer
         return OrderSerializer
     
     def get_permissions(self):
@@ -31,6 +56,8 @@ class OrderViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated, IsRestaurantOwner]
         elif self.action == 'create':
             permission_classes = [permissions.IsAuthenticated]  # Any authenticated user (will filter in serializer)
+        elif self.action == 'bulk_status':
+            permission_classes = [permissions.IsAuthenticated, IsRestaurant]
         else:
             permission_classes = [permissions.IsAuthenticated, IsCustomerOrRestaurantOwner]
         return [permission() for permission in permission_classes]
@@ -38,16 +65,50 @@ class OrderViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         
+        restaurant_pk = get_restaurant_pk(user)
+        customer_pk = get_customer_pk(user)
+        
         # If user is a restaurant, show only their orders
-        if hasattr(user, 'restaurant_profile'):
-            return Order.objects.filter(restaurant=user.restaurant_profile)
+        if restaurant_pk is not None:
+            queryset = Order.objects.filter(restaurant_id=restaurant_pk)
         
         # If user is a customer, show only their orders
-        elif hasattr(user, 'customer_profile'):
-            return Order.objects.filter(customer=user.customer_profile)
+        elif customer_pk is not None:
+            queryset = Order.objects.filter(customer_id=customer_pk)
         
         # Otherwise, return empty queryset
-        return Order.objects.none()
+        else:
+            return Order.objects.none()
+        
+        if self.action != 'export' and self.get_serializer_class() is OrderSerializer:
+            queryset = self.optimize_for_serializer(queryset)
+        return queryset
+    
+    @staticmethod
+    def optimize_for_serializer(queryset):
+        """
+        Load everything OrderSerializer touches in a fixed number of queries:
+        customer, user and restaurant are joined, items and their menu items
+        are prefetched in one extra query.
+        """
+        return queryset.select_related(
+            'customer__user', 'restaurant'
+        ).prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('menu_item'))
+        )
+    
+    def list(self, request, *args, **kwargs):
+        if self.get_serializer_class() is not OrderSerializer:
+            return super().list(request, *args, **kwargs)
+        
+        # Render the page from .values() rows, bypassing per-object DRF fields
+        queryset = FastOrderSerializer.project(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        rows = queryset if page is None else page
+        serializer = self.profile_serializer(FastOrderSerializer(rows, context=self.get_serializer_context()))
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -62,10 +123,69 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(order, data=request.data, partial=True)
         
         if serializer.is_valid():
-            serializer.save()
+            try:
+                serializer.save()
+            except TransitionConflict:
+                return self.transition_conflict_response()
             return Response(serializer.data)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """Move several orders to the same status with a single UPDATE."""
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        new_status = serializer.validated_data['status']
+        order_ids = list(dict.fromkeys(serializer.validated_data['orders']))
+        updated, skipped = [], []
+        try:
+            with transaction.atomic():
+                orders = self.get_queryset().filter(pk__in=order_ids).only(*TRANSITION_FIELDS).select_for_update()
+                orders = {order.pk: order for order in orders}
+                for order_id in order_ids:
+                    order = orders.get(order_id)
+                    if order is None:
+                        skipped.append({'id': order_id, 'detail': "Order not found."})
+                    elif not can_transition(order.status, new_status):
+                        skipped.append({
+                            'id': order_id,
+                            'detail': f"Invalid status transition from '{order.status}'."
+                        })
+                    else:
+                        updated.append(order)
+                transition_orders(updated, new_status)
+        except TransitionConflict:
+            return self.transition_conflict_response()
+        
+        return Response({
+            'status': new_status,
+            'updated': [order.pk for order in updated],
+            'skipped': skipped,
+        })
+    
+    def transition_conflict_response(self):
+        return Response(
+            {"detail": "The order status was changed by another request. Reload the order and try again."},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the filtered orders, one row per item, as CSV or JSON Lines."""
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in FORMATS:
+            return Response(
+                {"file_format": [f"Must be one of: {', '.join(FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(export_orders(queryset, file_format), content_type=CONTENT_TYPES[file_format])
+        response['Content-Disposition'] = f'attachment; filename="orders.{file_format}"'
+        return response
 
 class OrderItemViewSet(viewsets.ModelViewSet):
     """API endpoint for order items."""
@@ -84,3 +204,123 @@ class OrderItemViewSet(viewsets.ModelViewSet):
         if 'order_pk' in self.kwargs:
             context['order'] = Order.objects.get(pk=self.kwargs['order_pk'])
         return context
+
+class SalesAnalyticsView(APIView):
+    """
+    Base view for restaurant sales analytics.
+    
+    Reads only the daily rollup tables, so the cost depends on the number of
+    days requested rather than on the number of orders.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsRestaurant]
+    
+    def get_range(self, request):
+        serializer = SalesRangeSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+    
+    def filter_range(self, queryset, params):
+        queryset = queryset.filter(restaurant_id=get_restaurant_pk(self.request.user))
+        if params.get('start'):
+            queryset = queryset.filter(day__gte=params['start'])
+        if params.get('end'):
+            queryset = queryset.filter(day__lte=params['end'])
+        return queryset
+
+class DailySalesView(SalesAnalyticsView):
+    """Delivered orders and revenue per day."""
+    
+    def get(self, request):
+        params = self.get_range(request)
+        queryset = self.filter_range(RestaurantDailySales.objects.all(), params)
+        days = RestaurantDailySalesSerializer(queryset, many=True).data
+        totals = queryset.aggregate(order_count=Sum('order_count'), revenue=Sum('revenue'))
+        return Response({
+            'order_count': totals['order_count'] or 0,
+            'revenue': f"{totals['revenue'] or 0:.2f}",
+            'days': days,
+        })
+
+class TopMenuItemsView(SalesAnalyticsView):
+    """Best-selling menu items by quantity over a date range."""
+    
+    def get(self, request):
+        params = self.get_range(request)
+        queryset = self.filter_range(MenuItemDailySales.objects.all(), params)
+        rows = queryset.values(
+            'menu_item_id', 'menu_item__name'
+        ).annotate(
+            quantity_sold=Sum('quantity'),
+            order_count=Sum('order_count'),
+            total_revenue=Sum('revenue')
+        ).order_by('-quantity_sold', 'menu_item_id')[:params['limit']]
+        return Response([
+            {
+                'menu_item': row['menu_item_id'],
+                'menu_item_name': row['menu_item__name'],
+                'quantity': row['quantity_sold'],
+                'order_count': row['order_count'],
+                'revenue': f"{row['total_revenue']:.2f}",
+            }
+            for row in rows
+        ])
+
+ORDER_EVENTS_HEARTBEAT = 15  # seconds between keep-alive comments
+
+def get_stream_restaurant_id(request):
+    """
+    Return the restaurant id of the JWT sent with an event stream request.
+    
+    EventSource cannot set headers, so the token may also be passed as the
+    ``token`` query parameter. Besides the token claims, only the cached
+    active flag of the user is read.
+    """
+    token = get_validated_token(request, allow_query_param=True)
+    if token is None or not token.get('is_restaurant'):
+        return None
+    # A restaurant profile shares its primary key with its user
+    user_id = get_token_user_id(token)
+    if user_id is None or not is_user_active(user_id):
+        return None
+    return user_id
+
+async def order_events(request):
+    """
+    Server-sent events stream of order activity for the caller's restaurant.
+    
+    Emits ``order.created`` and ``order.status_changed`` events as they are
+    committed, replacing polling of the order list. Only served under ASGI,
+    where each open stream costs a coroutine: a WSGI server would tie up a
+    worker thread per connected board for as long as it stays open.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "Live order events are only available when the API is served over ASGI."},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    
+    restaurant_id = await sync_to_async(get_stream_restaurant_id)(request)
+    if restaurant_id is None:
+        return JsonResponse(
+            {"detail": "A valid restaurant access token is required."},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    
+    async def stream():
+        subscription = get_broker().subscribe(restaurant_id)
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), ORDER_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class ProjectConfig(AppConfig):
+    name = 'restaurant_order_system'
+    verbose_name = 'Restaurant order system'
+    
+    def ready(self):
+        import restaurant_order_system.checks
+        from .profiling import install_query_counter
+        # Before any connection is opened, so every thread's connections count
+        # the queries of the profiled requests
+        connection_created.connect(install_query_counter, dispatch_uid='request-profiling')
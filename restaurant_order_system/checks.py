@@ -0,0 +1,23 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+from .db_router import get_replicas
+
+
+@register(Tags.caches, Tags.database)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Require a shared cache for the read-your-writes pins when replicas are configured."""
+    if not get_replicas() or not isinstance(caches['default'], LocMemCache):
+        return []
+    return [
+        Error(
+            "DATABASE_REPLICAS is set but the default cache is process-local.",
+            hint=(
+                "Users are pinned to the primary after a write in the default cache; requests served by "
+                "another process would read from a replica before the write reached it. "
+                "Use a shared cache backend."
+            ),
+            id='restaurant_order_system.E001',
+        )
+    ]
@@ -0,0 +1,219 @@
+"""
+Routing of reads to database replicas.
+
+While ``ReplicaRoutingMiddleware`` serves a safe-method request (GET, HEAD,
+OPTIONS), reads go to one of the ``DATABASE_REPLICAS`` aliases, picked once
+per request. Writes, every query of an unsafe request or of a transaction,
+and code running outside requests use the primary (``default``).
+
+After a successful write, reads of that user stay on the primary for
+``DATABASE_REPLICA_STICKY_SECONDS``, so customers see the order they just
+placed despite replication lag. The pin is kept in the default cache, per
+user, so it covers every API client, and every process as long as that
+cache is shared; ``checks`` reports an error for a process-local one when
+replicas are configured.
+
+Streaming responses (the CSV/JSON Lines exports) run their queries while the
+body is iterated, after the view returned; their content is read with the
+request's routing active, so those reads go to the replica too.
+"""
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import FileResponse
+from django.utils.functional import LazyObject, empty
+from rest_framework.permissions import SAFE_METHODS
+
+# Apps always read from the primary: a session must be readable right after login
+PRIMARY_ONLY_APPS = {'sessions'}
+
+_current_routing = contextvars.ContextVar('replica_routing', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 10)
+
+
+def pin_key(user_id):
+    return f'db-primary-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Send the reads of ``user_id`` to the primary for the sticky period."""
+    cache.set(pin_key(user_id), True, get_sticky_seconds())
+
+
+async def apin_to_primary(user_id):
+    await cache.aset(pin_key(user_id), True, get_sticky_seconds())
+
+
+def get_authenticated_user_id(request):
+    """Return the id of the request's user once authenticated, without triggering authentication."""
+    user = request.__dict__.get('user')
+    if isinstance(user, LazyObject):
+        # Resolving Django's lazy user would itself query the database
+        user = user._wrapped
+        if user is empty:
+            return None
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+class ReplicaRouting:
+    """Routing state of the request being served."""
+
+    def __init__(self, request):
+        self.request = request
+        self.use_replicas = request.method in SAFE_METHODS
+        self.replica = None
+        self.pinned = None
+
+    def is_pinned(self):
+        if self.pinned is None:
+            user_id = get_authenticated_user_id(self.request)
+            if user_id is None:
+                # Not authenticated (yet); asked again on the next read
+                return False
+            self.pinned = bool(cache.get(pin_key(user_id)))
+        return self.pinned
+
+    def get_replica(self, replicas):
+        if self.replica is None:
+            self.replica = random.choice(replicas)
+        return self.replica
+
+
+class ReplicaRouter:
+    """Database router sending the reads of safe-method requests to replicas."""
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas:
+            return None
+        routing = _current_routing.get()
+        if (
+            routing is None
+            or not routing.use_replicas
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+            or routing.is_pinned()
+        ):
+            return DEFAULT_DB_ALIAS
+        return routing.get_replica(replicas)
+
+    def db_for_write(self, model, **hints):
+        if not get_replicas():
+            return None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def iter_with_routing(routing, content):
+    """Iterate ``content`` with ``routing`` active around each chunk."""
+    iterator = iter(content)
+    while True:
+        token = _current_routing.set(routing)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _current_routing.reset(token)
+        yield chunk
+
+
+async def aiter_with_routing(routing, content):
+    """Async variant of ``iter_with_routing``."""
+    iterator = aiter(content)
+    while True:
+        token = _current_routing.set(routing)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            _current_routing.reset(token)
+        yield chunk
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Enable replica reads for safe-method requests and pin users after their writes.
+
+    Works under WSGI and ASGI; async views run their ORM calls through
+    ``sync_to_async``, which carries the routing over to the sync thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = ReplicaRouting(request)
+        token = _current_routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_routing.reset(token)
+
+        self.route_streaming_content(response, routing)
+        user_id = self.get_user_to_pin(request, response, routing)
+        if user_id is not None:
+            pin_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request):
+        routing = ReplicaRouting(request)
+        token = _current_routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_routing.reset(token)
+
+        self.route_streaming_content(response, routing)
+        user_id = self.get_user_to_pin(request, response, routing)
+        if user_id is not None:
+            await apin_to_primary(user_id)
+        return response
+
+    @staticmethod
+    def route_streaming_content(response, routing):
+        """Keep ``routing`` active while a streaming body is produced."""
+        # Files are not read from the database, and wrapping them would
+        # disable the server's sendfile path
+        if not response.streaming or isinstance(response, FileResponse):
+            return
+        if response.is_async:
+            response.streaming_content = aiter_with_routing(routing, response.streaming_content)
+        else:
+            response.streaming_content = iter_with_routing(routing, response.streaming_content)
+
+    @staticmethod
+    def get_user_to_pin(request, response, routing):
+        """Return the id of the user whose reads must stay on the primary, if any."""
+        if routing.use_replicas or response.status_code >= 400:
+            return None
+        return get_authenticated_user_id(request)
@@ -0,0 +1,291 @@
+"""
+Per-request query budgets and profiling.
+
+``RequestProfilingMiddleware`` records, for every resolved request, the
+number of SQL queries, the time spent in the database, the time spent
+serializing (for views using ``ProfiledViewMixin``), the response size and
+the total time. The numbers are sent back in a ``Server-Timing`` header and
+aggregated per route into a process-local store served by ``MetricsView``.
+
+Everything is configured by the ``REQUEST_PROFILING`` setting::
+
+    REQUEST_PROFILING = {
+        'ENABLED': True,
+        'SAMPLE_SIZE': 1000,           # samples kept per route for percentiles
+        'QUERY_BUDGETS': {'order-list': 3, 'POST order-list': 6},
+        'BUDGET_ACTION': 'log',        # or 'raise' to fail tests
+    }
+
+Budgets are looked up by ``"<METHOD> <view name>"`` first, then by view name.
+
+Queries are counted by one execute wrapper per database connection,
+installed when the connection is created (see ``apps.ProjectConfig``), which
+charges each query to the profile of the request it runs for (a context
+variable). Wrappers are never added or removed per request, so concurrent
+ASGI requests sharing the sync thread's connections cannot take each other's
+counters.
+"""
+import contextvars
+import logging
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SAMPLE_SIZE': 1000,
+    'QUERY_BUDGETS': {},
+    'BUDGET_ACTION': 'log',
+}
+
+_current_profile = contextvars.ContextVar('request_profile', default=None)
+
+
+def get_profiling_setting(name):
+    return getattr(settings, 'REQUEST_PROFILING', {}).get(name, DEFAULTS[name])
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a view runs more queries than its budget allows."""
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class RequestProfile:
+    """Counters collected while one request is handled."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self._serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Called by the connections' execute wrapper, see count_query
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def wrap_serializer(self, serializer):
+        """Time ``serializer.to_representation`` excluding the queries it runs."""
+        to_representation = serializer.to_representation
+
+        def timed_to_representation(instance):
+            if self._serializing:
+                return to_representation(instance)
+            self._serializing = True
+            started, db_time = time.perf_counter(), self.db_time
+            try:
+                return to_representation(instance)
+            finally:
+                self._serializing = False
+                self.serializer_time += (time.perf_counter() - started) - (self.db_time - db_time)
+
+        serializer.to_representation = timed_to_representation
+        return serializer
+
+
+class RouteMetrics:
+    """Process-local samples of the profiled requests, grouped by route."""
+    fields = ('duration_ms', 'queries', 'db_ms', 'serializer_ms', 'response_bytes')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, sample):
+        size = get_profiling_setting('SAMPLE_SIZE')
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    'count': 0,
+                    'samples': defaultdict(lambda: deque(maxlen=size)),
+                }
+            entry['count'] += 1
+            for name, value in sample.items():
+                if value is not None:
+                    entry['samples'][name].append(value)
+
+    def summary(self):
+        with self._lock:
+            routes = {
+                route: (entry['count'], {name: sorted(values) for name, values in entry['samples'].items()})
+                for route, entry in self._routes.items()
+            }
+        result = {}
+        for route, (count, samples) in sorted(routes.items()):
+            result[route] = {'count': count}
+            for name in self.fields:
+                values = samples.get(name)
+                if not values:
+                    continue
+                result[route][name] = {
+                    'p50': round(percentile(values, 50), 3),
+                    'p95': round(percentile(values, 95), 3),
+                    'p99': round(percentile(values, 99), 3),
+                    'max': round(values[-1], 3),
+                    'mean': round(statistics.fmean(values), 3),
+                }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+metrics = RouteMetrics()
+
+
+def get_current_profile():
+    """Return the profile of the request being handled, or None when profiling is off."""
+    return _current_profile.get()
+
+
+def count_query(execute, sql, params, many, context):
+    """Execute wrapper charging the query to the current request's profile."""
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    """Add ``count_query`` to the execute wrappers of ``connection``, once."""
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+def get_query_budget(method, view_name):
+    budgets = get_profiling_setting('QUERY_BUDGETS')
+    budget = budgets.get(f'{method} {view_name}')
+    return budgets.get(view_name) if budget is None else budget
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile each request; see the module docstring for configuration.
+
+    Works under WSGI and ASGI. Streaming responses are measured up to the
+    moment their body starts, so long-lived streams do not skew the metrics.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not get_profiling_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self.record(request, response, profile, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        # Copied into the sync thread by sync_to_async along with the context
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self.record(request, response, profile, time.perf_counter() - started)
+
+    def record(self, request, response, profile, duration):
+        """Add the profile to the response headers and metrics, and enforce the query budget."""
+        match = request.resolver_match
+        if match is None or not match.view_name:
+            return response
+        view_name = match.view_name
+
+        size = None if response.streaming else len(response.content)
+        timings = [
+            f'db;dur={profile.db_time * 1000:.1f};desc="{profile.queries} queries"',
+            f'ser;dur={profile.serializer_time * 1000:.1f}',
+            f'app;dur={duration * 1000:.1f}',
+        ]
+        if size is not None:
+            timings.append(f'size;desc="{size} bytes"')
+        response['Server-Timing'] = ', '.join(timings)
+
+        metrics.record(f'{request.method} {view_name}', {
+            'duration_ms': duration * 1000,
+            'queries': profile.queries,
+            'db_ms': profile.db_time * 1000,
+            'serializer_ms': profile.serializer_time * 1000,
+            'response_bytes': size,
+        })
+
+        budget = get_query_budget(request.method, view_name)
+        if budget is not None and profile.queries > budget:
+            message = (
+                f'{request.method} {view_name} ran {profile.queries} queries, '
+                f'over its budget of {budget}'
+            )
+            if get_profiling_setting('BUDGET_ACTION') == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class ProfiledViewMixin:
+    """Add serializer time to the request profile of a generic view."""
+
+    def get_serializer(self, *args, **kwargs):
+        return self.profile_serializer(super().get_serializer(*args, **kwargs))
+
+    def profile_serializer(self, serializer):
+        """Time ``serializer`` (anything with ``to_representation``) when profiling."""
+        profile = get_current_profile()
+        if profile is not None:
+            profile.wrap_serializer(serializer)
+        return serializer
+
+
+class MetricsView(APIView):
+    """
+    Per-route p50/p95/p99 of the profiled requests of this process.
+
+    DELETE clears the collected samples.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'enabled': get_profiling_setting('ENABLED'),
+            'routes': metrics.summary(),
+        })
+
+    def delete(self, request):
+        metrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
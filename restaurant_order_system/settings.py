@@ -49,12 +49,15 @@ INSTALLED_APPS = [
     'django_filters',
     
     # Local apps
+    'restaurant_order_system.apps.ProjectConfig',
     'accounts.apps.AccountsConfig',
     'menu',
     'orders',
 ]
 
 MIDDLEWARE = [
+    "restaurant_order_system.profiling.RequestProfilingMiddleware",
+    "restaurant_order_system.db_router.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -92,9 +95,88 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Production profile (WAL, tuned pragmas, IMMEDIATE transactions):
+        # "ENGINE": "restaurant_order_system.sqlite_backend",
+    },
+    # Read replicas are extra aliases listed in DATABASE_REPLICAS, e.g.:
+    # "replica": {
+    #     "ENGINE": "django.db.backends.sqlite3",
+    #     "NAME": BASE_DIR / "db-replica.sqlite3",
+    #     "TEST": {"MIRROR": "default"},
+    # },
+}
+
+# Reads of safe-method requests go to these aliases (see db_router); after a
+# write, the user's reads stay on the primary for the sticky period. The pins
+# live in the default cache, which must then be shared by all processes
+DATABASE_ROUTERS = ['restaurant_order_system.db_router.ReplicaRouter']
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_STICKY_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "restaurant-order-system",
     }
 }
 
+# Cache alias and lifetime of the prebuilt menu snapshots. The alias also holds
+# the menu versions, so it must be shared by all processes to invalidate at
+# once; only with a process-local cache do versions expire, after
+# MENU_VERSION_TIMEOUT, which bounds the staleness between processes.
+MENU_SNAPSHOT_CACHE = 'default'
+MENU_SNAPSHOT_TIMEOUT = 60 * 60 * 24
+MENU_VERSION_TIMEOUT = 60
+
+# Restaurants whose menu prices and availability each process keeps for order
+# placement, and, with a process-local cache, the seconds after which an
+# entry is reloaded regardless
+MENU_STATE_CACHE_SIZE = 256
+MENU_STATE_MAX_AGE = 30
+
+
+# Order events
+# Broker fanning out order.created / order.status_changed to the live board
+# stream; replace with a broker-backed class when running several processes.
+ORDER_EVENTS_BROKER = 'orders.events.InProcessBroker'
+
+
+# Idempotency keys
+# Responses to POST /api/orders/ sent with an Idempotency-Key header are
+# replayed for retries during IDEMPOTENCY_KEY_TTL seconds; a key whose first
+# request has not finished after IDEMPOTENCY_KEY_LOCK_TIMEOUT seconds is
+# considered abandoned and may be claimed again.
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+IDEMPOTENCY_KEY_LOCK_TIMEOUT = 60
+
+
+# Request profiling
+# Query count, DB/serializer time and response size per view, sent as
+# Server-Timing headers and aggregated at /api/metrics/. Budgets are keyed by
+# URL name, optionally prefixed with the HTTP method; set BUDGET_ACTION to
+# 'raise' to turn an exceeded budget into an error (useful in tests).
+REQUEST_PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_SIZE': 1000,
+    'QUERY_BUDGETS': {
+        'order-list': 3,
+        'order-detail': 2,
+        'POST order-list': 10,
+        'POST order-bulk-status': 4,
+        'menuitem-list': 2,
+        'menuitem-detail': 1,
+        'user-type': 0,
+        'restaurant-profile': 1,
+        'restaurant-nearby': 1,
+        'customer-profile': 1,
+    },
+    'BUDGET_ACTION': 'log',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -147,7 +229,7 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -165,10 +247,19 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
 }
 
+# Access tokens are checked against a cached "user exists and is active" flag;
+# saving or deleting a user refreshes it, otherwise it expires after this long
+USER_ACTIVE_CACHE_SECONDS = 60
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Menu item images get resized JPEG and WebP variants of these widths, encoded
+# in the background by this many processes (0 encodes during the request)
+MENU_IMAGE_VARIANT_WIDTHS = (160, 320, 640, 1280)
+MENU_IMAGE_WORKERS = 2
+
 # Swagger/OpenAPI settings
 SWAGGER_SETTINGS = {
     'DEFAULT_INFO': 'restaurant_order_system.urls.openapi_info',
@@ -0,0 +1,54 @@
+"""
+SQLite backend with a production performance profile.
+
+Select it with ``"ENGINE": "restaurant_order_system.sqlite_backend"``. Every
+new connection applies ``PERFORMANCE_PRAGMAS`` (WAL journaling, relaxed
+syncing, bigger page cache, memory-mapped I/O, a busy timeout), and
+``transaction.atomic`` starts ``BEGIN IMMEDIATE`` transactions. A deferred
+transaction that reads before writing fails with "database is locked" when
+another connection wrote in between, without waiting for the busy timeout;
+an immediate one takes the write lock upfront and waits its turn instead.
+
+``OPTIONS`` may override single pragmas with ``"pragmas": {...}`` and the
+transaction mode with ``"transaction_mode"``; other options are passed to
+``sqlite3.connect`` as usual.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PERFORMANCE_PRAGMAS = {
+    # Readers no longer block the writer, nor the writer readers
+    'journal_mode': 'WAL',
+    # In WAL mode only a power loss can lose the last commits, never corrupt the file
+    'synchronous': 'NORMAL',
+    # Wait up to 5 s for a lock instead of failing right away
+    'busy_timeout': 5000,
+    # 64 MiB page cache per connection (negative values are KiB)
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PERFORMANCE_PRAGMAS, **params.pop('pragmas', {})}
+        self.transaction_mode = params.pop('transaction_mode', 'IMMEDIATE').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}, not {self.transaction_mode!r}."
+            )
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
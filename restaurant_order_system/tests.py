@@ -0,0 +1,124 @@
+import asyncio
+import os
+import re
+import sqlite3
+import tempfile
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections, transaction
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+
+from accounts.serializers import CustomTokenObtainPairSerializer
+from accounts.testing import create_customer, create_restaurant
+from menu.models import MenuItem
+from orders.models import Order
+from .profiling import count_query
+from .sqlite_backend.base import PERFORMANCE_PRAGMAS
+
+
+@override_settings(REQUEST_PROFILING={'ENABLED': True})
+class RequestProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = create_restaurant()
+        customer = create_customer()
+        for n in range(3):
+            MenuItem.objects.create(restaurant=cls.restaurant, name=f'Dish {n}', price=Decimal('5.00'))
+            Order.objects.create(customer=customer, restaurant=cls.restaurant)
+        token = CustomTokenObtainPairSerializer.get_token(cls.restaurant.user).access_token
+        cls.headers = {'Authorization': f'Bearer {token}'}
+
+    def get_query_count(self, response):
+        self.assertEqual(response.status_code, 200)
+        return int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+
+    async def test_overlapping_async_requests_count_their_own_queries(self):
+        client = AsyncClient()
+        urls = [f'/api/menu/async/items/?restaurant_id={self.restaurant.pk}', '/api/orders/async/']
+        alone = [self.get_query_count(await client.get(url, headers=self.headers)) for url in urls]
+        self.assertNotEqual(alone[0], alone[1])
+        for _ in range(3):
+            responses = await asyncio.gather(*(client.get(url, headers=self.headers) for url in urls))
+            self.assertEqual([self.get_query_count(response) for response in responses], alone)
+        # The counter is installed once, not per request
+        wrappers = await sync_to_async(lambda: list(connection.execute_wrappers))()
+        self.assertEqual(wrappers.count(count_query), 1)
+
+    def test_sync_request_counts_its_queries(self):
+        self.client.defaults['HTTP_AUTHORIZATION'] = self.headers['Authorization']
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/orders/')
+        self.assertEqual(self.get_query_count(response), 2)
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    """The performance backend, on its own database file."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'db.sqlite3')
+        self.addCleanup(self.directory.cleanup)
+
+    def get_connection(self, **options):
+        # Registered after the test case set up its databases, like a replica
+        connections.settings['performance'] = {
+            **connections.settings['default'],
+            'ENGINE': 'restaurant_order_system.sqlite_backend',
+            'NAME': self.path,
+            'OPTIONS': options,
+        }
+        self.addCleanup(self.drop_connection)
+        return connections['performance']
+
+    def drop_connection(self):
+        connections['performance'].close()
+        del connections['performance']
+        del connections.settings['performance']
+
+    def get_pragma(self, conn, name):
+        with conn.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_new_connection_applies_the_pragmas(self):
+        conn = self.get_connection()
+        self.assertEqual(self.get_pragma(conn, 'journal_mode'), 'wal')
+        self.assertEqual(self.get_pragma(conn, 'busy_timeout'), PERFORMANCE_PRAGMAS['busy_timeout'])
+        self.assertEqual(self.get_pragma(conn, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.get_pragma(conn, 'cache_size'), PERFORMANCE_PRAGMAS['cache_size'])
+        self.assertEqual(self.get_pragma(conn, 'mmap_size'), PERFORMANCE_PRAGMAS['mmap_size'])
+        self.assertEqual(self.get_pragma(conn, 'temp_store'), 2)  # MEMORY
+
+    def test_options_override_single_pragmas(self):
+        conn = self.get_connection(pragmas={'busy_timeout': 250})
+        self.assertEqual(self.get_pragma(conn, 'busy_timeout'), 250)
+        self.assertEqual(self.get_pragma(conn, 'journal_mode'), 'wal')
+
+    def test_atomic_takes_the_write_lock_upfront(self):
+        conn = self.get_connection()
+        with conn.cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (value integer)')
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        with transaction.atomic(using='performance'):
+            # Nothing read or written yet, and the lock is already held
+            with self.assertRaisesMessage(sqlite3.OperationalError, 'database is locked'):
+                other.execute('BEGIN IMMEDIATE')
+        other.execute('BEGIN IMMEDIATE')
+        other.execute('ROLLBACK')
+
+    def test_deferred_transaction_mode(self):
+        conn = self.get_connection(transaction_mode='deferred')
+        conn.ensure_connection()
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        with transaction.atomic(using='performance'):
+            other.execute('BEGIN IMMEDIATE')
+            other.execute('ROLLBACK')
+
+    def test_invalid_transaction_mode(self):
+        conn = self.get_connection(transaction_mode='eager')
+        with self.assertRaisesMessage(ImproperlyConfigured, "transaction_mode must be one of"):
+            conn.ensure_connection()
@@ -28,6 +28,7 @@ from drf_yasg import openapi
 
 # Import the schema views
 from .schema import urlpatterns as schema_urls
+from .profiling import MetricsView
 
 # Schema View for API documentation
 schema_view = get_schema_view(
@@ -148,6 +149,9 @@ urlpatterns = [
     path('api/accounts/', include('accounts.urls')),
     path('api/menu/', include('menu.urls')),
     path('api/orders/', include('orders.urls')),
+    
+    # Request profiling metrics
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
 ]
 
 # Serve media files in development